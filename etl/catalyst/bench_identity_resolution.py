@@ -0,0 +1,69 @@
+"""
+Benchmark parallel identity resolution against resolve_people.
+
+Generates a reproducible synthetic proposer corpus (names with typos, case and
+punctuation noise), times resolve_people once and resolve_people_parallel for
+each worker count, and checks that every parallel run produces the same
+records as resolve_people.
+"""
+
+import random
+import string
+import time
+from typing import Any, Dict, List
+
+from catalyst.identity_resolution import resolve_people, resolve_people_parallel
+
+
+def _misspell(name: str, rng: random.Random) -> str:
+    chars = list(name)
+    position = rng.randrange(len(chars))
+    operation = rng.random()
+    if operation < 0.4:
+        chars[position] = rng.choice(string.ascii_lowercase)
+    elif operation < 0.7:
+        chars.insert(position, rng.choice(string.ascii_lowercase))
+    elif len(chars) > 4:
+        chars.pop(position)
+    variant = "".join(chars)
+    return variant.title() if rng.random() < 0.5 else variant
+
+
+def synthetic_proposals(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    first_names = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8))) for _ in range(800)]
+    last_names = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))) for _ in range(800)]
+    people = [f"{rng.choice(first_names)} {rng.choice(last_names)}" for _ in range(count // 3)]
+    proposals = []
+    for proposal_id in range(count):
+        names = [rng.choice(people) for _ in range(rng.randint(1, 3))]
+        names = [_misspell(name, rng) if rng.random() < 0.3 else name for name in names]
+        proposals.append({"id": proposal_id, "proposer": ", ".join(names)})
+    return proposals
+
+
+def run(proposal_count: int, worker_counts: List[int]) -> None:
+    proposals = synthetic_proposals(proposal_count)
+    started = time.perf_counter()
+    baseline = list(resolve_people(proposals))
+    baseline_time = time.perf_counter() - started
+    print(f"{'workers':>10} {'seconds':>10} {'speedup':>8} {'people':>8}")
+    print(f"{'sequential':>10} {baseline_time:>10.2f} {1.0:>8.2f} {len(baseline):>8}")
+    for workers in worker_counts:
+        started = time.perf_counter()
+        people = list(resolve_people_parallel(proposals, workers=workers))
+        elapsed = time.perf_counter() - started
+        if people != baseline:
+            raise RuntimeError(f"Output with {workers} workers differs from resolve_people")
+        print(f"{workers:>10} {elapsed:>10.2f} {baseline_time / elapsed:>8.2f} {len(people):>8}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark parallel identity resolution against resolve_people")
+    parser.add_argument("--proposals", type=int, default=20000, help="Number of synthetic proposals")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    args = parser.parse_args()
+
+    run(args.proposals, [int(value) for value in args.workers.split(",")])
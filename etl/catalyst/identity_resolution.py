@@ -1,9 +1,25 @@
+import os
 import re
+import sys
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from difflib import SequenceMatcher
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
 
 NAME_SPLIT_REGEX = re.compile(r"\s*(?:,|/|\band\b|&|\+|\||;)\s*", re.IGNORECASE)
+BLOCK_PREFIX_LENGTH = 4
+BLOCK_NGRAM_SIZE = 3
+# Below this threshold a match is no longer guaranteed to share a blocking key.
+BLOCKING_MIN_THRESHOLD = 0.85
+# Characters are folded into this many count buckets; folding only loosens the bound.
+CHAR_BUCKETS = 128
+BATCH_CHUNK_SIZE = 256
+# Shards per worker for parallel pair scoring; more shards even out the load.
+SHARDS_PER_WORKER = 4
 
 
 def normalize_name(name: str) -> str:
@@ -21,22 +37,268 @@ def similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a, b).ratio()
 
 
-@dataclass
+def char_counts(names: Sequence[str]) -> np.ndarray:
+    counts = np.zeros((len(names), CHAR_BUCKETS), dtype=np.int32)
+    for row, name in enumerate(names):
+        if name:
+            codes = np.frombuffer(name.encode("utf-32-le"), dtype=np.uint32) % CHAR_BUCKETS
+            counts[row] = np.bincount(codes, minlength=CHAR_BUCKETS)
+    return counts
+
+
+def similarity_bounds(
+    query_counts: np.ndarray,
+    query_lengths: np.ndarray,
+    candidate_counts: np.ndarray,
+    candidate_lengths: np.ndarray,
+) -> np.ndarray:
+    # Vectorized SequenceMatcher.quick_ratio(): an upper bound on ratio().
+    shared = np.minimum(query_counts[:, None, :], candidate_counts[None, :, :]).sum(axis=2)
+    totals = query_lengths[:, None] + candidate_lengths[None, :]
+    bounds = np.ones(shared.shape, dtype=np.float64)
+    np.divide(2.0 * shared, totals, out=bounds, where=totals > 0)
+    return bounds
+
+
+def batch_similarity(
+    queries: Sequence[str],
+    candidates: Sequence[str],
+    floor: float = 0.0,
+) -> np.ndarray:
+    """Score every query against every candidate in one call.
+
+    ``scores[i, j]`` equals ``similarity(queries[i], candidates[j])`` exactly
+    whenever it is at least ``floor``. Pairs whose character-count bound is
+    already below ``floor`` are reported as 0.0 without running difflib, so
+    thresholding the matrix gives the same decisions as the pairwise function.
+    """
+    scores = np.zeros((len(queries), len(candidates)), dtype=np.float64)
+    if not len(queries) or not len(candidates):
+        return scores
+    query_counts = char_counts(queries)
+    query_lengths = np.array([len(query) for query in queries], dtype=np.int64)
+    candidate_counts = char_counts(candidates)
+    candidate_lengths = np.array([len(candidate) for candidate in candidates], dtype=np.int64)
+
+    for start in range(0, len(queries), BATCH_CHUNK_SIZE):
+        stop = start + BATCH_CHUNK_SIZE
+        bounds = similarity_bounds(
+            query_counts[start:stop],
+            query_lengths[start:stop],
+            candidate_counts,
+            candidate_lengths,
+        )
+        rows, columns = np.nonzero(bounds >= floor)
+        # Group by candidate so difflib indexes each candidate string once.
+        order = np.lexsort((rows, columns))
+        matcher = SequenceMatcher(None)
+        current = -1
+        for row, column in zip(rows[order], columns[order]):
+            if column != current:
+                matcher.set_seq2(candidates[column])
+                current = column
+            matcher.set_seq1(queries[start + row])
+            score = matcher.ratio()
+            if score >= floor:
+                scores[start + row, column] = score
+    return scores
+
+
+def blocking_keys(normalized: str) -> Set[str]:
+    keys = {f"t:{token}" for token in normalized.split()}
+    keys.add(f"p:{normalized[:BLOCK_PREFIX_LENGTH]}")
+    padded = f"#{normalized}#"
+    if len(padded) <= BLOCK_NGRAM_SIZE:
+        keys.add(f"g:{padded}")
+    else:
+        for start in range(len(padded) - BLOCK_NGRAM_SIZE + 1):
+            keys.add(f"g:{padded[start:start + BLOCK_NGRAM_SIZE]}")
+    return keys
+
+
+class BlockingIndex:
+    """Candidate index over normalized canonical names.
+
+    Names scoring at least ``BLOCKING_MIN_THRESHOLD`` always share a key, so
+    scoring only the entries that share one (in insertion order) finds the
+    same first match as a full scan. With ``batch=True`` the candidates are
+    pruned with the vectorized ``similarity_bounds`` kernel over cached
+    character counts before any pair is scored with difflib.
+    """
+
+    def __init__(self, batch: bool = False) -> None:
+        self.names: List[str] = []
+        self.batch = batch
+        self._blocks: Dict[str, List[int]] = {}
+        self._counts = np.zeros((0, CHAR_BUCKETS), dtype=np.int32)
+        self._lengths = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, normalized: str) -> int:
+        position = len(self.names)
+        self.names.append(normalized)
+        for key in blocking_keys(normalized):
+            self._blocks.setdefault(key, []).append(position)
+        if self.batch:
+            if position >= len(self._counts):
+                capacity = max(64, 2 * len(self._counts))
+                self._counts = np.resize(self._counts, (capacity, CHAR_BUCKETS))
+                self._lengths = np.resize(self._lengths, capacity)
+            self._counts[position] = char_counts([normalized])[0]
+            self._lengths[position] = len(normalized)
+        return position
+
+    def candidates(self, normalized: str) -> List[int]:
+        positions: Set[int] = set()
+        for key in blocking_keys(normalized):
+            block = self._blocks.get(key)
+            if block:
+                positions.update(block)
+        return sorted(positions)
+
+    def first_match(self, normalized: str, threshold: float) -> Optional[Tuple[int, float]]:
+        if threshold >= BLOCKING_MIN_THRESHOLD:
+            positions: Iterable[int] = self.candidates(normalized)
+        else:
+            positions = range(len(self.names))
+        if self.batch:
+            return self._first_match_batch(normalized, threshold, positions)
+        length = len(normalized)
+        for position in positions:
+            candidate = self.names[position]
+            total = length + len(candidate)
+            # ratio() can never exceed 2 * min(len) / total, so skip hopeless lengths.
+            if total and 2 * min(length, len(candidate)) / total < threshold:
+                continue
+            matcher = SequenceMatcher(None, normalized, candidate)
+            if matcher.quick_ratio() < threshold:
+                continue
+            score = matcher.ratio()
+            if score >= threshold:
+                return position, score
+        return None
+
+    def _first_match_batch(
+        self,
+        normalized: str,
+        threshold: float,
+        positions: Iterable[int],
+    ) -> Optional[Tuple[int, float]]:
+        candidates = np.fromiter(positions, dtype=np.int64)
+        if not len(candidates):
+            return None
+        bounds = similarity_bounds(
+            char_counts([normalized]),
+            np.array([len(normalized)], dtype=np.int64),
+            self._counts[candidates],
+            self._lengths[candidates],
+        )[0]
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(normalized)
+        for position in candidates[bounds >= threshold]:
+            matcher.set_seq2(self.names[position])
+            score = matcher.ratio()
+            if score >= threshold:
+                return int(position), score
+        return None
+
+
+@dataclass(slots=True)
 class PersonRecord:
     canonical_name: str
     aliases: List[str] = field(default_factory=list)
     confidence: float = 1.0
 
 
-@dataclass
+@dataclass(slots=True)
 class OrganizationRecord:
     name: str
     confidence: float = 1.0
 
 
+class IdentityStore:
+    """Array-backed identity records.
+
+    Canonical names and aliases are interned. Confidence lives in a flat
+    ``array('d')`` and aliases in one shared pool, chained per record through
+    head/tail/next offset arrays. Indexing returns ``PersonRecord`` or
+    ``OrganizationRecord`` snapshots, so the store reads like the lists the
+    resolvers used to return; mutate it through ``add_alias`` and
+    ``confidence``, not through the snapshots.
+    """
+
+    __slots__ = ("record_type", "names", "confidence", "_alias_names", "_alias_next", "_alias_head", "_alias_tail")
+
+    def __init__(self, record_type: type = PersonRecord) -> None:
+        self.record_type = record_type
+        self.names: List[str] = []
+        self.confidence = array("d")
+        self._alias_names: List[str] = []
+        self._alias_next = array("l")
+        self._alias_head = array("l")
+        self._alias_tail = array("l")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[Any]:
+        for position in range(len(self.names)):
+            yield self.record(position)
+
+    def __getitem__(self, item: Union[int, slice]) -> Any:
+        if isinstance(item, slice):
+            return [self.record(position) for position in range(len(self.names))[item]]
+        return self.record(range(len(self.names))[item])
+
+    def append(self, name: str, confidence: float = 1.0) -> int:
+        position = len(self.names)
+        self.names.append(sys.intern(name))
+        self.confidence.append(confidence)
+        self._alias_head.append(-1)
+        self._alias_tail.append(-1)
+        return position
+
+    def aliases(self, position: int) -> List[str]:
+        aliases: List[str] = []
+        offset = self._alias_head[position]
+        while offset != -1:
+            aliases.append(self._alias_names[offset])
+            offset = self._alias_next[offset]
+        return aliases
+
+    def add_alias(self, position: int, alias: str) -> bool:
+        if alias == self.names[position] or alias in self.aliases(position):
+            return False
+        offset = len(self._alias_names)
+        self._alias_names.append(sys.intern(alias))
+        self._alias_next.append(-1)
+        tail = self._alias_tail[position]
+        if tail == -1:
+            self._alias_head[position] = offset
+        else:
+            self._alias_next[tail] = offset
+        self._alias_tail[position] = offset
+        return True
+
+    def record(self, position: int) -> Any:
+        if self.record_type is OrganizationRecord:
+            return OrganizationRecord(name=self.names[position], confidence=self.confidence[position])
+        return PersonRecord(
+            canonical_name=self.names[position],
+            aliases=self.aliases(position),
+            confidence=self.confidence[position],
+        )
+
+
+PERSON_NAME_FIELDS = ("ideascale_user", "proposer", "proposer_name", "proposer_full_name")
+ORGANIZATION_NAME_FIELDS = ("organization", "company", "team")
+
+
 def extract_people_from_proposal(proposal: Dict[str, Any]) -> List[str]:
     candidates: List[str] = []
-    for key in ("ideascale_user", "proposer", "proposer_name", "proposer_full_name"):
+    for key in PERSON_NAME_FIELDS:
         value = proposal.get(key)
         if isinstance(value, str) and value.strip():
             candidates.extend(split_names(value))
@@ -45,67 +307,345 @@ def extract_people_from_proposal(proposal: Dict[str, Any]) -> List[str]:
 
 def extract_orgs_from_proposal(proposal: Dict[str, Any]) -> List[str]:
     orgs: List[str] = []
-    for key in ("organization", "company", "team"):
+    for key in ORGANIZATION_NAME_FIELDS:
         value = proposal.get(key)
         if isinstance(value, str) and value.strip():
             orgs.extend(split_names(value))
     return list({org for org in orgs if org})
 
 
+class PeopleResolver:
+    """Incremental form of ``resolve_people``.
+
+    Records passed to ``seed`` (e.g. loaded from the database) are matched
+    exactly like records created during resolution. Positions of seeded
+    records whose aliases or confidence changed are collected in ``changed``;
+    records at or beyond ``seeded`` are new. ``index`` replaces the default
+    ``BlockingIndex``, e.g. with a precomputed ``MatchTable``.
+    """
+
+    def __init__(self, threshold: float = 0.86, batch: bool = False, index: Optional[Any] = None) -> None:
+        self.threshold = threshold
+        self.people = IdentityStore(PersonRecord)
+        self.seeded = 0
+        self.changed: Set[int] = set()
+        self._index = index if index is not None else BlockingIndex(batch=batch)
+        # Normalized names map to the record they first matched: records
+        # created later are scanned after it, so the match is stable. Raw
+        # names are remembered separately so repeats skip normalization.
+        self._known: Dict[str, Tuple[int, float]] = {}
+        self._seen: Dict[str, int] = {}
+
+    def seed(self, record: PersonRecord) -> int:
+        canonical_norm = sys.intern(normalize_name(record.canonical_name))
+        position = self._index.add(canonical_norm)
+        self.people.append(record.canonical_name, record.confidence)
+        self.seeded = len(self.people)
+        self._known.setdefault(canonical_norm, (position, 1.0))
+        self._seen.setdefault(record.canonical_name, position)
+        for alias in record.aliases:
+            self.people.add_alias(position, alias)
+            alias_norm = normalize_name(alias)
+            if alias_norm not in self._known:
+                self._known[alias_norm] = (position, similarity(alias_norm, canonical_norm))
+            self._seen.setdefault(alias, position)
+        return position
+
+    def add(self, name: str) -> int:
+        seen = self._seen.get(name)
+        if seen is not None:
+            return seen
+        normalized = normalize_name(name)
+        match = self._known.get(normalized)
+        if match is None:
+            match = self._index.first_match(normalized, self.threshold)
+            if match is None:
+                normalized = sys.intern(normalized)
+                position = self._index.add(normalized)
+                self.people.append(name)
+                self._known[normalized] = (position, 1.0)
+                self._seen[name] = position
+                return position
+            self._known[normalized] = match
+        position, score = match
+        self._seen[name] = position
+        if self.people.add_alias(position, name):
+            self._mark_changed(position)
+        if score > self.people.confidence[position]:
+            self.people.confidence[position] = score
+            self._mark_changed(position)
+        return position
+
+    def _mark_changed(self, position: int) -> None:
+        if position < self.seeded:
+            self.changed.add(position)
+
+
+class OrganizationResolver:
+    """Incremental form of ``resolve_organizations``; see ``PeopleResolver``."""
+
+    def __init__(self, threshold: float = 0.9, batch: bool = False, index: Optional[Any] = None) -> None:
+        self.threshold = threshold
+        self.organizations = IdentityStore(OrganizationRecord)
+        self.seeded = 0
+        self.changed: Set[int] = set()
+        self._index = index if index is not None else BlockingIndex(batch=batch)
+        self._known: Dict[str, Tuple[int, float]] = {}
+        self._seen: Dict[str, int] = {}
+
+    def seed(self, record: OrganizationRecord) -> int:
+        canonical_norm = sys.intern(normalize_name(record.name))
+        position = self._index.add(canonical_norm)
+        self.organizations.append(record.name, record.confidence)
+        self.seeded = len(self.organizations)
+        self._known.setdefault(canonical_norm, (position, 1.0))
+        self._seen.setdefault(record.name, position)
+        return position
+
+    def add(self, name: str) -> int:
+        seen = self._seen.get(name)
+        if seen is not None:
+            return seen
+        normalized = normalize_name(name)
+        match = self._known.get(normalized)
+        if match is None:
+            match = self._index.first_match(normalized, self.threshold)
+            if match is None:
+                normalized = sys.intern(normalized)
+                position = self._index.add(normalized)
+                self.organizations.append(name)
+                self._known[normalized] = (position, 1.0)
+                self._seen[name] = position
+                return position
+            self._known[normalized] = match
+        position, score = match
+        self._seen[name] = position
+        if score > self.organizations.confidence[position]:
+            self.organizations.confidence[position] = score
+            if position < self.seeded:
+                self.changed.add(position)
+        return position
+
+
 def resolve_people(
     proposals: Iterable[Dict[str, Any]],
     threshold: float = 0.86,
-) -> List[PersonRecord]:
-    people: List[PersonRecord] = []
+    batch: bool = False,
+) -> IdentityStore:
+    resolver = PeopleResolver(threshold=threshold, batch=batch)
     for proposal in proposals:
         for name in extract_people_from_proposal(proposal):
-            normalized = normalize_name(name)
-            matched = False
-            for person in people:
-                canonical_norm = normalize_name(person.canonical_name)
-                score = similarity(normalized, canonical_norm)
-                if score >= threshold:
-                    if name not in person.aliases and name != person.canonical_name:
-                        person.aliases.append(name)
-                    person.confidence = max(person.confidence, score)
-                    matched = True
-                    break
-            if not matched:
-                people.append(PersonRecord(canonical_name=name, aliases=[], confidence=1.0))
-    return people
+            resolver.add(name)
+    return resolver.people
 
 
 def resolve_organizations(
     proposals: Iterable[Dict[str, Any]],
     threshold: float = 0.9,
-) -> List[OrganizationRecord]:
-    orgs: List[OrganizationRecord] = []
+    batch: bool = False,
+) -> IdentityStore:
+    resolver = OrganizationResolver(threshold=threshold, batch=batch)
     for proposal in proposals:
         for org in extract_orgs_from_proposal(proposal):
-            normalized = normalize_name(org)
-            matched = False
-            for record in orgs:
-                canonical_norm = normalize_name(record.name)
-                score = similarity(normalized, canonical_norm)
-                if score >= threshold:
-                    record.confidence = max(record.confidence, score)
-                    matched = True
-                    break
-            if not matched:
-                orgs.append(OrganizationRecord(name=org, confidence=1.0))
-    return orgs
+            resolver.add(org)
+    return resolver.organizations
+
+
+class MatchTable:
+    """Stand-in for ``BlockingIndex`` backed by precomputed pair scores.
+
+    ``pairs`` holds every ``(earlier, later, score)`` pair of ``names`` at or
+    above the resolver's threshold. ``first_match`` returns the earliest
+    *added* (canonical) name among a name's earlier matches, which is what
+    ``BlockingIndex.first_match`` finds by scanning, so a resolver driven by
+    this table produces the same records as the sequential one.
+    """
+
+    def __init__(self, names: Sequence[str], pairs: Iterable[Tuple[int, int, float]]) -> None:
+        self.names: List[str] = []
+        self._ids = {name: position for position, name in enumerate(names)}
+        self._earlier: Dict[int, List[Tuple[int, float]]] = {}
+        for earlier, later, score in sorted(pairs):
+            self._earlier.setdefault(later, []).append((earlier, score))
+        self._positions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, normalized: str) -> int:
+        position = len(self.names)
+        self.names.append(normalized)
+        self._positions[self._ids[normalized]] = position
+        return position
+
+    def first_match(self, normalized: str, threshold: float) -> Optional[Tuple[int, float]]:
+        # Earlier ids are sorted and canonical names are added in id order,
+        # so the first added one is also the earliest index position.
+        for earlier, score in self._earlier.get(self._ids[normalized], ()):
+            position = self._positions.get(earlier)
+            if position is not None:
+                return position, score
+        return None
+
+
+_SHARD_NAMES: List[str] = []
+_SHARD_THRESHOLD = 1.0
+_SHARD_BLOCKS: Dict[str, List[int]] = {}
+_SHARD_COUNTS = np.zeros((0, CHAR_BUCKETS), dtype=np.int32)
+_SHARD_LENGTHS = np.zeros(0, dtype=np.int64)
+
+
+def _shard_keys(normalized: str, threshold: float) -> Set[str]:
+    if threshold >= BLOCKING_MIN_THRESHOLD:
+        return blocking_keys(normalized)
+    return {"*"}
+
+
+def _init_shard_worker(names: List[str], threshold: float) -> None:
+    global _SHARD_NAMES, _SHARD_THRESHOLD, _SHARD_BLOCKS, _SHARD_COUNTS, _SHARD_LENGTHS
+    _SHARD_NAMES = names
+    _SHARD_THRESHOLD = threshold
+    # Blocks are rebuilt in each worker rather than pickled; members ascend.
+    blocks: Dict[str, List[int]] = {}
+    for position, normalized in enumerate(names):
+        for key in _shard_keys(normalized, threshold):
+            blocks.setdefault(key, []).append(position)
+    _SHARD_BLOCKS = blocks
+    _SHARD_COUNTS = char_counts(names)
+    _SHARD_LENGTHS = np.fromiter((len(name) for name in names), dtype=np.int64, count=len(names))
+
+
+def _score_shard(earlier_ids: Sequence[int]) -> List[Tuple[int, int, float]]:
+    """Score each name in ``earlier_ids`` against the later names sharing a key with it.
+
+    Every pair belongs to its earlier name, so each is scored exactly once.
+    The earlier name is difflib's ``b`` side, as in ``BlockingIndex.first_match``,
+    which keeps scores identical and builds its lookup tables once per name.
+    Candidates are pruned with one ``similarity_bounds`` call per earlier name.
+    """
+    names = _SHARD_NAMES
+    threshold = _SHARD_THRESHOLD
+    blocks = _SHARD_BLOCKS
+    counts = _SHARD_COUNTS
+    lengths = _SHARD_LENGTHS
+    matches: List[Tuple[int, int, float]] = []
+    matcher = SequenceMatcher(None)
+    for earlier in earlier_ids:
+        earlier_name = names[earlier]
+        later_ids: Set[int] = set()
+        for key in _shard_keys(earlier_name, threshold):
+            block = blocks[key]
+            later_ids.update(block[bisect_right(block, earlier):])
+        if not later_ids:
+            continue
+        candidates = np.fromiter(later_ids, dtype=np.int64, count=len(later_ids))
+        bounds = similarity_bounds(
+            counts[earlier : earlier + 1], lengths[earlier : earlier + 1], counts[candidates], lengths[candidates]
+        )[0]
+        candidates = candidates[bounds >= threshold]
+        if not len(candidates):
+            continue
+        matcher.set_seq2(earlier_name)
+        for later in candidates.tolist():
+            matcher.set_seq1(names[later])
+            score = matcher.ratio()
+            if score >= threshold:
+                matches.append((earlier, later, score))
+    return matches
+
+
+def match_pairs(
+    names: Sequence[str],
+    threshold: float,
+    workers: Optional[int] = None,
+) -> List[Tuple[int, int, float]]:
+    """All ``(earlier, later, score)`` pairs of normalized ``names`` scoring at least ``threshold``.
+
+    Names are dealt round-robin into shards, which evens out the cost
+    (earlier names have more later candidates); the shards are scored on a
+    process pool. The result does not depend on ``workers``.
+    """
+    workers = workers or os.cpu_count() or 1
+    shard_count = workers * SHARDS_PER_WORKER
+    shards = [range(offset, len(names), shard_count) for offset in range(min(shard_count, len(names)))]
+    names = list(names)
+    matches: List[Tuple[int, int, float]] = []
+    if workers == 1:
+        _init_shard_worker(names, threshold)
+        for shard in shards:
+            matches.extend(_score_shard(shard))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_shard_worker,
+            initargs=(names, threshold),
+        ) as executor:
+            for shard_matches in executor.map(_score_shard, shards):
+                matches.extend(shard_matches)
+    return matches
+
+
+def _match_table(raw_names: Sequence[str], threshold: float, workers: Optional[int]) -> MatchTable:
+    names = list(dict.fromkeys(normalize_name(raw) for raw in raw_names))
+    return MatchTable(names, match_pairs(names, threshold, workers))
+
+
+def _distinct_names(proposals: Iterable[Dict[str, Any]], extract: Any) -> List[str]:
+    seen: Dict[str, None] = {}
+    for proposal in proposals:
+        for name in extract(proposal):
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+def resolve_people_parallel(
+    proposals: Iterable[Dict[str, Any]],
+    threshold: float = 0.86,
+    workers: Optional[int] = None,
+) -> IdentityStore:
+    """Same records as ``resolve_people``, with the pair scoring spread over ``workers`` processes."""
+    names = _distinct_names(proposals, extract_people_from_proposal)
+    resolver = PeopleResolver(threshold=threshold, index=_match_table(names, threshold, workers))
+    for name in names:
+        resolver.add(name)
+    return resolver.people
+
+
+def resolve_organizations_parallel(
+    proposals: Iterable[Dict[str, Any]],
+    threshold: float = 0.9,
+    workers: Optional[int] = None,
+) -> IdentityStore:
+    """Same records as ``resolve_organizations``; see ``resolve_people_parallel``."""
+    names = _distinct_names(proposals, extract_orgs_from_proposal)
+    resolver = OrganizationResolver(threshold=threshold, index=_match_table(names, threshold, workers))
+    for name in names:
+        resolver.add(name)
+    return resolver.organizations
 
 
 def build_identity_index(
     proposals: Iterable[Dict[str, Any]],
-) -> Tuple[List[PersonRecord], List[OrganizationRecord]]:
-    proposals_list = list(proposals)
-    return resolve_people(proposals_list), resolve_organizations(proposals_list)
+    batch: bool = False,
+) -> Tuple[IdentityStore, IdentityStore]:
+    """Resolve people and organizations in a single pass over ``proposals``.
+
+    ``proposals`` may be any iterable, including a generator over a
+    server-side cursor; only the resolved identities are kept in memory.
+    """
+    people = PeopleResolver(batch=batch)
+    organizations = OrganizationResolver(batch=batch)
+    for proposal in proposals:
+        for name in extract_people_from_proposal(proposal):
+            people.add(name)
+        for org in extract_orgs_from_proposal(proposal):
+            organizations.add(org)
+    return people.people, organizations.organizations
 
 
 def summarize_identities(
-    people: List[PersonRecord],
-    organizations: List[OrganizationRecord],
+    people: Sequence[PersonRecord],
+    organizations: Sequence[OrganizationRecord],
 ) -> Dict[str, Any]:
     return {
         "people": [
@@ -0,0 +1,180 @@
+"""
+Combined CatalystExplorer ingest.
+
+Pages through ``/proposals`` once and hands every item to each enabled sink:
+the ``catalyst_proposals`` upsert, ``VotingRecord`` building and link
+extraction into ``Link``. A new consumer only needs ``add``/``close`` methods,
+so it costs no extra HTTP traffic.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from catalyst import ingest_links, ingest_proposals, ingest_voting_records
+from catalyst.link_extraction import LinkRecord, extract_links_from_proposal
+from common.sync_state import ensure_sync_state, get_sync_state, needs_full_sync, save_cursor
+
+SINK_NAMES = ("proposals", "votes", "links")
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger("catalyst.ingest.explorer")
+
+
+class ProposalSink:
+    sync_source: Optional[str] = ingest_proposals.SYNC_SOURCE
+
+    def __init__(self, engine: Any, batch_size: int = ingest_proposals.UPSERT_BATCH_SIZE, use_copy: bool = False):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.batch: Dict[Any, Dict[str, Any]] = {}
+        self.counts = [0, 0, 0]
+        ingest_proposals.ensure_schema(engine)
+
+    def add(self, item: Dict[str, Any]) -> None:
+        row = ingest_proposals.transform_proposal(item)
+        self.batch[row["proposal_id"]] = row
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self.batch:
+            return
+        written = ingest_proposals.write_proposal_batch(self.engine, list(self.batch.values()), use_copy=self.use_copy)
+        self.counts = [total + count for total, count in zip(self.counts, written)]
+        self.batch = {}
+
+    def close(self, full: bool) -> None:
+        self._flush()
+        logger.info("Proposals inserted: %s, changed: %s, untouched: %s", *self.counts)
+
+
+class VotingSink:
+    sync_source: Optional[str] = ingest_voting_records.SYNC_SOURCE
+
+    def __init__(self, engine: Any):
+        self.engine = engine
+        self.fund_lookup, self.project_lookup = ingest_voting_records.load_lookups(engine)
+        self.captured_at = datetime.now(timezone.utc)
+        self.rows: List[Dict[str, Any]] = []
+
+    def add(self, item: Dict[str, Any]) -> None:
+        record = ingest_voting_records.build_record(item, self.fund_lookup, self.project_lookup, self.captured_at)
+        if record is not None:
+            self.rows.append(record)
+
+    def close(self, full: bool) -> None:
+        reranked = ingest_voting_records.rank_records(self.engine, self.rows, full)
+        ingest_voting_records.upsert_records(self.rows)
+        ingest_voting_records.update_rankings(reranked)
+
+
+class LinkSink:
+    sync_source: Optional[str] = None
+
+    def __init__(self, engine: Any):
+        self.engine = engine
+        with engine.connect() as connection:
+            self.project_lookup = ingest_links.build_project_lookup(connection)
+        self.seen_at = datetime.now(timezone.utc)
+        self.rows: List[Tuple[str, str, LinkRecord]] = []
+
+    def add(self, item: Dict[str, Any]) -> None:
+        project_id = self.project_lookup.get(str(item.get("id")))
+        if project_id is None:
+            return
+        source_url = item.get("url") or f"{ingest_links.PROPOSALS_ENDPOINT}/{item.get('id')}"
+        for link in extract_links_from_proposal(item):
+            self.rows.append((project_id, source_url, link))
+
+    def close(self, full: bool) -> None:
+        with self.engine.begin() as connection:
+            inserted, refreshed = ingest_links.write_links(connection, self.rows, self.seen_at)
+        logger.info("Links inserted: %s, refreshed: %s", inserted, refreshed)
+
+
+def build_sinks(engine: Any, names: Sequence[str], batch_size: int, use_copy: bool) -> List[Any]:
+    sinks: List[Any] = []
+    for name in names:
+        if name == "proposals":
+            sinks.append(ProposalSink(engine, batch_size=batch_size, use_copy=use_copy))
+        elif name == "votes":
+            sinks.append(VotingSink(engine))
+        elif name == "links":
+            sinks.append(LinkSink(engine))
+        else:
+            raise ValueError(f"Unknown sink {name!r}; expected one of {', '.join(SINK_NAMES)}")
+    return sinks
+
+
+def run(
+    sink_names: Sequence[str] = SINK_NAMES,
+    full: bool = False,
+    concurrency: int = ingest_proposals.DEFAULT_CONCURRENCY,
+    batch_size: int = ingest_proposals.UPSERT_BATCH_SIZE,
+    use_copy: bool = False,
+) -> None:
+    engine = ingest_proposals.get_engine()
+    ensure_sync_state(engine)
+    sinks = build_sinks(engine, sink_names, batch_size, use_copy)
+
+    # One pass serves every sink, so it starts from the oldest sink cursor and
+    # goes full if any sink is due a reconcile.
+    sources = [sink.sync_source for sink in sinks if sink.sync_source]
+    with engine.connect() as connection:
+        states = [get_sync_state(connection, source) for source in sources]
+    full = full or not sources or any(needs_full_sync(state, ingest_proposals.FULL_SYNC_INTERVAL) for state in states)
+    since = None if full else min(state["cursor"] for state in states)
+    cursor: List[Optional[datetime]] = [since]
+
+    if full:
+        logger.info("Running full CatalystExplorer sync into %s", ", ".join(sink_names))
+        items = ingest_proposals.fetch_proposals(concurrency=concurrency)
+    else:
+        logger.info("Running incremental CatalystExplorer sync from %s into %s", since.isoformat(), ", ".join(sink_names))
+        items = ingest_proposals.fetch_updated_proposals(since)
+
+    fetched = 0
+    for item in ingest_proposals.track_cursor(items, cursor):
+        for sink in sinks:
+            sink.add(item)
+        fetched += 1
+    logger.info("Fetched %s proposals", fetched)
+
+    for sink in sinks:
+        sink.close(full)
+
+    with engine.begin() as connection:
+        for source in sources:
+            save_cursor(connection, source, cursor[0], full_sync=full)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fetch CatalystExplorer proposals once and feed every sink")
+    parser.add_argument("--sinks", default=",".join(SINK_NAMES), help="Comma-separated sinks: proposals, votes, links")
+    parser.add_argument("--full", action="store_true", help="Fetch every proposal instead of only updated ones")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=ingest_proposals.DEFAULT_CONCURRENCY,
+        help="Pages fetched in parallel",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=ingest_proposals.UPSERT_BATCH_SIZE,
+        help="Proposals per upsert transaction",
+    )
+    parser.add_argument("--copy", action="store_true", help="Load proposal batches through COPY")
+    args = parser.parse_args()
+
+    run(
+        sink_names=[name.strip() for name in args.sinks.split(",") if name.strip()],
+        full=args.full,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        use_copy=args.copy,
+    )
@@ -0,0 +1,292 @@
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert
+
+from catalyst.identity_resolution import (
+    ORGANIZATION_NAME_FIELDS,
+    PERSON_NAME_FIELDS,
+    IdentityStore,
+    OrganizationRecord,
+    OrganizationResolver,
+    PeopleResolver,
+    PersonRecord,
+    build_identity_index,
+    extract_orgs_from_proposal,
+    extract_people_from_proposal,
+    summarize_identities,
+)
+from catalyst.ingest_proposals import ensure_schema as ensure_proposal_schema
+from common.sync_state import ensure_sync_state, get_cursor, save_cursor
+
+SYNC_SOURCE = "identity_resolution"
+SOURCE_URL = "https://www.catalystexplorer.com/api/v1/proposals"
+SOURCE_TYPE = "identity_resolution"
+STREAM_BATCH_SIZE = 1000
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger("catalyst.ingest.identities")
+
+metadata = MetaData()
+
+catalyst_proposals = Table(
+    "catalyst_proposals",
+    metadata,
+    Column("proposal_id", Integer, primary_key=True),
+    Column("content_changed_at", DateTime(timezone=True), nullable=False),
+    Column("raw_payload", JSONB, nullable=False),
+)
+
+people = Table(
+    "Person",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("aliases", ARRAY(String), nullable=False),
+    Column("sourceUrl", String, nullable=False),
+    Column("sourceType", String, nullable=False),
+    Column("lastSeenAt", DateTime(timezone=True), nullable=False),
+    Column("createdAt", DateTime(timezone=True), nullable=False),
+    Column("updatedAt", DateTime(timezone=True), nullable=False),
+)
+
+organizations = Table(
+    "Organization",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("sourceUrl", String, nullable=False),
+    Column("sourceType", String, nullable=False),
+    Column("lastSeenAt", DateTime(timezone=True), nullable=False),
+    Column("createdAt", DateTime(timezone=True), nullable=False),
+    Column("updatedAt", DateTime(timezone=True), nullable=False),
+)
+
+identity_confidence = Table(
+    "identity_confidence",
+    metadata,
+    Column("entity_type", String, primary_key=True),
+    Column("entity_id", String, primary_key=True),
+    Column("confidence", Float, nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def get_engine() -> Any:
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL is required to run identity resolution")
+    return create_engine(database_url)
+
+
+def load_confidence(connection: Any, entity_type: str) -> Dict[str, float]:
+    rows = connection.execute(
+        select(identity_confidence.c.entity_id, identity_confidence.c.confidence).where(
+            identity_confidence.c.entity_type == entity_type
+        )
+    )
+    return {row.entity_id: row.confidence for row in rows}
+
+
+def seed_people(connection: Any, resolver: PeopleResolver) -> List[str]:
+    confidence = load_confidence(connection, "person")
+    person_ids: List[str] = []
+    stmt = select(people.c.id, people.c.name, people.c.aliases).order_by(people.c.createdAt, people.c.id)
+    for row in connection.execute(stmt):
+        resolver.seed(
+            PersonRecord(
+                canonical_name=row.name,
+                aliases=list(row.aliases or []),
+                confidence=confidence.get(row.id, 1.0),
+            )
+        )
+        person_ids.append(row.id)
+    return person_ids
+
+
+def seed_organizations(connection: Any, resolver: OrganizationResolver) -> List[str]:
+    confidence = load_confidence(connection, "organization")
+    org_ids: List[str] = []
+    stmt = select(organizations.c.id, organizations.c.name).order_by(
+        organizations.c.createdAt, organizations.c.id
+    )
+    for row in connection.execute(stmt):
+        resolver.seed(OrganizationRecord(name=row.name, confidence=confidence.get(row.id, 1.0)))
+        org_ids.append(row.id)
+    return org_ids
+
+
+def iter_changed_proposals(
+    connection: Any,
+    since: Optional[datetime],
+) -> Iterable[Tuple[Dict[str, Any], datetime]]:
+    # Only the name fields are read out of raw_payload, server-side. The
+    # cursor is content_changed_at: last_seen_at moves on every ingest, even
+    # for proposals whose content did not change.
+    fields = PERSON_NAME_FIELDS + ORGANIZATION_NAME_FIELDS
+    changed_at = catalyst_proposals.c.content_changed_at
+    columns = [catalyst_proposals.c.raw_payload[key].astext.label(key) for key in fields]
+    stmt = select(changed_at, *columns)
+    if since is not None:
+        stmt = stmt.where(changed_at > since)
+    stmt = stmt.order_by(changed_at, catalyst_proposals.c.proposal_id)
+    result = connection.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    for row in result.mappings():
+        yield {key: row[key] for key in fields}, row["content_changed_at"]
+
+
+def build_identity_index_from_db(engine: Any, batch: bool = False) -> Tuple[IdentityStore, IdentityStore]:
+    with engine.connect() as connection:
+        proposals = (proposal for proposal, _changed_at in iter_changed_proposals(connection, None))
+        return build_identity_index(proposals, batch=batch)
+
+
+def write_people(connection: Any, resolver: PeopleResolver, person_ids: List[str]) -> Tuple[int, int]:
+    now = datetime.now(timezone.utc)
+    new_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": person.canonical_name,
+            "aliases": person.aliases,
+            "sourceUrl": SOURCE_URL,
+            "sourceType": SOURCE_TYPE,
+            "lastSeenAt": now,
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        for person in resolver.people[resolver.seeded:]
+    ]
+    if new_rows:
+        connection.execute(people.insert(), new_rows)
+
+    confidence_rows = []
+    for position in sorted(resolver.changed):
+        person = resolver.people[position]
+        connection.execute(
+            people.update()
+            .where(people.c.id == person_ids[position])
+            .values(aliases=person.aliases, lastSeenAt=now, updatedAt=now)
+        )
+        confidence_rows.append(("person", person_ids[position], person.confidence))
+    for row, person in zip(new_rows, resolver.people[resolver.seeded:]):
+        if person.confidence != 1.0:
+            confidence_rows.append(("person", row["id"], person.confidence))
+    upsert_confidence(connection, confidence_rows)
+    return len(new_rows), len(resolver.changed)
+
+
+def write_organizations(
+    connection: Any,
+    resolver: OrganizationResolver,
+    org_ids: List[str],
+) -> Tuple[int, int]:
+    now = datetime.now(timezone.utc)
+    new_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": org.name,
+            "sourceUrl": SOURCE_URL,
+            "sourceType": SOURCE_TYPE,
+            "lastSeenAt": now,
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        for org in resolver.organizations[resolver.seeded:]
+    ]
+    if new_rows:
+        connection.execute(organizations.insert(), new_rows)
+
+    confidence_rows = [
+        ("organization", org_ids[position], resolver.organizations[position].confidence)
+        for position in sorted(resolver.changed)
+    ]
+    for row, org in zip(new_rows, resolver.organizations[resolver.seeded:]):
+        if org.confidence != 1.0:
+            confidence_rows.append(("organization", row["id"], org.confidence))
+    upsert_confidence(connection, confidence_rows)
+    return len(new_rows), len(resolver.changed)
+
+
+def upsert_confidence(connection: Any, rows: List[Tuple[str, str, float]]) -> None:
+    if not rows:
+        return
+    now = datetime.now(timezone.utc)
+    stmt = insert(identity_confidence).values(
+        [
+            {"entity_type": entity_type, "entity_id": entity_id, "confidence": confidence, "updated_at": now}
+            for entity_type, entity_id, confidence in rows
+        ]
+    )
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["entity_type", "entity_id"],
+            set_={"confidence": stmt.excluded.confidence, "updated_at": stmt.excluded.updated_at},
+        )
+    )
+
+
+def run(full: bool = False, batch: bool = False) -> None:
+    engine = get_engine()
+    ensure_proposal_schema(engine)
+    metadata.create_all(engine, tables=[identity_confidence])
+    ensure_sync_state(engine)
+
+    with engine.begin() as connection:
+        since = None if full else get_cursor(connection, SYNC_SOURCE)
+        people_resolver = PeopleResolver(batch=batch)
+        org_resolver = OrganizationResolver(batch=batch)
+        person_ids = seed_people(connection, people_resolver)
+        org_ids = seed_organizations(connection, org_resolver)
+        logger.info("Seeded %s people and %s organizations", len(person_ids), len(org_ids))
+
+        processed = 0
+        cursor = since
+        for proposal, changed_at in iter_changed_proposals(connection, since):
+            for name in extract_people_from_proposal(proposal):
+                people_resolver.add(name)
+            for org in extract_orgs_from_proposal(proposal):
+                org_resolver.add(org)
+            cursor = changed_at
+            processed += 1
+
+        new_people, changed_people = write_people(connection, people_resolver, person_ids)
+        new_orgs, changed_orgs = write_organizations(connection, org_resolver, org_ids)
+        save_cursor(connection, SYNC_SOURCE, cursor, full_sync=full)
+
+    logger.info(
+        "Resolved %s proposals. People: %s new, %s changed. Organizations: %s new, %s changed",
+        processed,
+        new_people,
+        changed_people,
+        new_orgs,
+        changed_orgs,
+    )
+
+
+def write_summary(output_path: str, batch: bool = False) -> None:
+    people_store, org_store = build_identity_index_from_db(get_engine(), batch=batch)
+    with open(output_path, "w", encoding="utf-8") as handle:
+        json.dump(summarize_identities(people_store, org_store), handle, indent=2, ensure_ascii=True)
+    logger.info("Wrote %s people and %s organizations to %s", len(people_store), len(org_store), output_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resolve people and organizations from Catalyst proposals")
+    parser.add_argument("--full", action="store_true", help="Re-resolve every proposal instead of only new ones")
+    parser.add_argument("--batch", action="store_true", help="Use the vectorized batch similarity kernel")
+    parser.add_argument("--summary", help="Resolve every proposal and write the summary JSON here instead of the database")
+    args = parser.parse_args()
+
+    if args.summary:
+        write_summary(args.summary, batch=args.batch)
+    else:
+        run(full=args.full, batch=args.batch)
@@ -0,0 +1,158 @@
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from catalyst.link_extraction import (
+    EMBEDDED_LINKS_FIELD,
+    PROPOSAL_LINK_FIELDS,
+    LinkRecord,
+    iter_links_batch,
+)
+from common.pg_copy import copy_rows
+
+PROPOSALS_ENDPOINT = "https://www.catalystexplorer.com/api/v1/proposals"
+SOURCE_TYPE = "catalyst_link_extraction"
+STREAM_BATCH_SIZE = 1000
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger("catalyst.ingest.links")
+
+metadata = MetaData()
+
+catalyst_proposals = Table(
+    "catalyst_proposals",
+    metadata,
+    Column("proposal_id", Integer, primary_key=True),
+    Column("raw_payload", JSONB, nullable=False),
+)
+
+projects = Table(
+    "Project",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("externalId", String),
+)
+
+STAGING_COLUMNS = ("id", "projectId", "type", "url", "sourceUrl", "sourceType", "lastSeenAt")
+
+CREATE_STAGING_SQL = """
+CREATE TEMP TABLE link_staging (
+    "id" TEXT NOT NULL,
+    "projectId" TEXT NOT NULL,
+    "type" TEXT NOT NULL,
+    "url" TEXT NOT NULL,
+    "sourceUrl" TEXT NOT NULL,
+    "sourceType" TEXT NOT NULL,
+    "lastSeenAt" TIMESTAMP(3) NOT NULL
+) ON COMMIT DROP
+"""
+
+# Existing (projectId, url) rows only get lastSeenAt refreshed.
+MERGE_STAGING_SQL = """
+INSERT INTO "Link" ("id", "projectId", "type", "url", "sourceUrl", "sourceType", "lastSeenAt", "createdAt", "updatedAt")
+SELECT DISTINCT ON ("projectId", "url")
+    "id", "projectId", "type", "url", "sourceUrl", "sourceType", "lastSeenAt", "lastSeenAt", "lastSeenAt"
+FROM link_staging
+ORDER BY "projectId", "url"
+ON CONFLICT ("projectId", "url") DO UPDATE SET "lastSeenAt" = EXCLUDED."lastSeenAt"
+RETURNING (xmax = 0) AS inserted
+"""
+
+
+def get_engine() -> Any:
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL is required to run link ingestion")
+    return create_engine(database_url)
+
+
+def build_project_lookup(connection: Any) -> Dict[str, str]:
+    lookup: Dict[str, str] = {}
+    for row in connection.execute(select(projects.c.id, projects.c.externalId)).mappings():
+        if row["externalId"]:
+            lookup[str(row["externalId"])] = row["id"]
+    return lookup
+
+
+def iter_proposal_link_sources(connection: Any) -> Iterator[Dict[str, Any]]:
+    # Pull only the scanned fields out of raw_payload, server-side.
+    payload = catalyst_proposals.c.raw_payload
+    columns = [payload[field].astext.label(field) for field in PROPOSAL_LINK_FIELDS]
+    columns.append(payload[EMBEDDED_LINKS_FIELD].label(EMBEDDED_LINKS_FIELD))
+    columns.append(payload["url"].astext.label("url"))
+    stmt = select(catalyst_proposals.c.proposal_id.label("id"), *columns).order_by(catalyst_proposals.c.proposal_id)
+    result = connection.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    for row in result.mappings():
+        yield dict(row)
+
+
+def write_links(
+    connection: Any,
+    links: Iterable[Tuple[str, str, LinkRecord]],
+    seen_at: datetime,
+) -> Tuple[int, int]:
+    """Bulk merge ``(project_id, source_url, link)`` rows into ``Link``.
+
+    Rows are streamed through ``COPY`` into a temporary staging table and
+    merged with one ``INSERT ... ON CONFLICT ("projectId", "url")``. Returns
+    ``(inserted, refreshed)``.
+    """
+    connection.execute(text(CREATE_STAGING_SQL))
+    staged = copy_rows(
+        connection,
+        "link_staging",
+        STAGING_COLUMNS,
+        (
+            (str(uuid.uuid4()), project_id, link.type, link.url, source_url, SOURCE_TYPE, seen_at)
+            for project_id, source_url, link in links
+        ),
+    )
+    if not staged:
+        return 0, 0
+    results = connection.execute(text(MERGE_STAGING_SQL)).scalars().all()
+    inserted = sum(1 for was_inserted in results if was_inserted)
+    return inserted, len(results) - inserted
+
+
+def run(workers: int = 1, chunk_size: int = 500) -> None:
+    engine = get_engine()
+    seen_at = datetime.now(timezone.utc)
+
+    with engine.connect() as read_connection, engine.begin() as write_connection:
+        project_lookup = build_project_lookup(read_connection)
+        source_urls: Dict[Any, str] = {}
+
+        def sources() -> Iterator[Dict[str, Any]]:
+            for proposal in iter_proposal_link_sources(read_connection):
+                if str(proposal["id"]) in project_lookup:
+                    source_urls[proposal["id"]] = proposal.get("url") or f"{PROPOSALS_ENDPOINT}/{proposal['id']}"
+                    yield proposal
+
+        def rows() -> Iterator[Tuple[str, str, LinkRecord]]:
+            for proposal_id, links in iter_links_batch(sources(), chunk_size=chunk_size, workers=workers):
+                project_id = project_lookup[str(proposal_id)]
+                source_url = source_urls.pop(proposal_id)
+                for link in links:
+                    yield project_id, source_url, link
+
+        inserted, refreshed = write_links(write_connection, rows(), seen_at)
+
+    logger.info("Link ingestion complete. Inserted %s, refreshed %s", inserted, refreshed)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract proposal links into the Link table")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used for link extraction")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Proposals per extraction chunk")
+    args = parser.parse_args()
+
+    run(workers=args.workers, chunk_size=args.chunk_size)
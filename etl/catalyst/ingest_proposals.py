@@ -1,17 +1,42 @@
+import hashlib
 import json
 import logging
 import os
-from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List
-import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
 from dotenv import load_dotenv
-from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text, create_engine
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    create_engine,
+    func,
+    literal_column,
+    text,
+    update,
+)
 from sqlalchemy.dialects.postgresql import JSONB, insert
 
+from common.http_client import get_json
+from common.pg_copy import copy_rows
+from common.sync_state import ensure_sync_state, get_sync_state, needs_full_sync, save_cursor
+
 BASE_URL = "https://www.catalystexplorer.com/api/v1"
 PROPOSALS_ENDPOINT = f"{BASE_URL}/proposals"
+DEFAULT_CONCURRENCY = 4
+FALLBACK_PER_PAGE = 24
+UPSERT_BATCH_SIZE = 500
+SYNC_SOURCE = "catalyst_proposals"
+FULL_SYNC_INTERVAL = timedelta(hours=24)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("catalyst.ingest.proposals")
@@ -34,6 +59,36 @@ catalyst_proposals = Table(
     Column("source_type", String(100), nullable=False),
     Column("last_seen_at", DateTime(timezone=True), nullable=False),
     Column("raw_payload", JSONB, nullable=False),
+    Column("content_hash", String(64), nullable=True),
+    # Moves only when a proposal is inserted or its content_hash changes,
+    # unlike last_seen_at; downstream incremental jobs key their cursors on it.
+    Column("content_changed_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index("ix_catalyst_proposals_content_changed_at", "content_changed_at"),
+)
+
+PROPOSAL_COLUMNS = tuple(column.name for column in catalyst_proposals.columns)
+UPDATE_COLUMNS = tuple(column for column in PROPOSAL_COLUMNS if column != "proposal_id")
+
+CREATE_STAGING_SQL = """
+CREATE TEMP TABLE proposal_staging (LIKE catalyst_proposals INCLUDING DEFAULTS) ON COMMIT DROP
+"""
+
+MERGE_STAGING_SQL = """
+INSERT INTO catalyst_proposals ({columns})
+SELECT {columns} FROM proposal_staging
+ON CONFLICT (proposal_id) DO UPDATE SET {updates}
+WHERE catalyst_proposals.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+RETURNING proposal_id, (xmax = 0) AS inserted
+""".format(
+    columns=", ".join(PROPOSAL_COLUMNS),
+    updates=", ".join(f"{column} = EXCLUDED.{column}" for column in UPDATE_COLUMNS),
+)
+
+# Tables created before content_hash existed pick it up on the next run.
+ADD_CONTENT_HASH_SQL = "ALTER TABLE catalyst_proposals ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"
+# Existing rows take the migration time, so dependent cursors reprocess them once.
+ADD_CONTENT_CHANGED_AT_SQL = (
+    "ALTER TABLE catalyst_proposals ADD COLUMN IF NOT EXISTS content_changed_at TIMESTAMPTZ NOT NULL DEFAULT now()"
 )
 
 
@@ -45,44 +100,150 @@ def get_engine() -> Any:
     return create_engine(database_url)
 
 
-def _get_with_retry(params: Dict[str, Any], retries: int = 3, backoff: float = 1.5) -> Dict[str, Any]:
-    attempt = 0
-    while True:
-        attempt += 1
-        try:
-            response = requests.get(PROPOSALS_ENDPOINT, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as exc:
-            if attempt >= retries:
-                raise
-            wait = backoff ** attempt
-            logger.warning("Request failed (attempt %s/%s): %s. Retrying in %.1fs", attempt, retries, exc, wait)
-            time.sleep(wait)
-
-
-def fetch_proposals(per_page: int = 60) -> Iterable[Dict[str, Any]]:
-    page = 1
+def _fetch_page(per_page: int, page: int, sort: Optional[str] = None) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"per_page": per_page, "page": page}
+    if sort:
+        params["sort"] = sort
+    return get_json(PROPOSALS_ENDPOINT, params=params, cached=True)
+
+
+def _last_page(payload: Dict[str, Any]) -> Optional[int]:
+    last_page = (payload.get("meta") or {}).get("last_page")
+    try:
+        return int(last_page)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fetch_serial(per_page: int, offset: int, sort: Optional[str] = None) -> Iterable[Dict[str, Any]]:
+    # Walk pages one by one starting at item ``offset`` until an empty page.
     while True:
-        params = {"per_page": per_page, "page": page}
+        page, skip = divmod(offset, per_page)
         try:
-            payload = _get_with_retry(params)
+            payload = _fetch_page(per_page, page + 1, sort)
         except requests.RequestException:
-            if per_page > 24:
-                logger.warning("Falling back to per_page=24 after repeated failures")
-                per_page = 24
+            if per_page > FALLBACK_PER_PAGE:
+                logger.warning("Falling back to per_page=%s after repeated failures", FALLBACK_PER_PAGE)
+                per_page = FALLBACK_PER_PAGE
                 continue
             raise
-        data = payload.get("data") or []
+        data = (payload.get("data") or [])[skip:]
         if not data:
             break
-        logger.info("Fetched %s proposals from page %s", len(data), page)
+        logger.info("Fetched %s proposals from page %s", len(data), page + 1)
         for item in data:
             yield item
-        page += 1
+        offset += len(data)
+
+
+def fetch_proposals(per_page: int = 60, concurrency: int = DEFAULT_CONCURRENCY) -> Iterable[Dict[str, Any]]:
+    """Yield every proposal in page order.
+
+    Page 1 is fetched first to learn ``meta.last_page``; the remaining pages
+    are fetched by a pool of ``concurrency`` threads with at most
+    ``2 * concurrency`` requests in flight. If a page still fails after
+    retries, the walk resumes serially from the same item with
+    ``per_page=24``.
+    """
+    try:
+        first = _fetch_page(per_page, 1)
+    except requests.RequestException:
+        if per_page <= FALLBACK_PER_PAGE:
+            raise
+        logger.warning("Falling back to per_page=%s after repeated failures", FALLBACK_PER_PAGE)
+        yield from _fetch_serial(FALLBACK_PER_PAGE, 0)
+        return
+
+    data = first.get("data") or []
+    if not data:
+        return
+    logger.info("Fetched %s proposals from page 1", len(data))
+    yield from data
+    offset = len(data)
+
+    last_page = _last_page(first)
+    if last_page is None or concurrency <= 1:
+        yield from _fetch_serial(per_page, offset)
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: Deque[Tuple[int, Future]] = deque()
+        next_page = 2
+        while pending or next_page <= last_page:
+            while next_page <= last_page and len(pending) < 2 * concurrency:
+                pending.append((next_page, executor.submit(_fetch_page, per_page, next_page)))
+                next_page += 1
+            page, future = pending.popleft()
+            try:
+                payload = future.result()
+            except requests.RequestException:
+                for _, queued in pending:
+                    queued.cancel()
+                if per_page <= FALLBACK_PER_PAGE:
+                    raise
+                logger.warning(
+                    "Page %s failed; continuing serially with per_page=%s from item %s",
+                    page,
+                    FALLBACK_PER_PAGE,
+                    offset,
+                )
+                yield from _fetch_serial(FALLBACK_PER_PAGE, offset)
+                return
+            data = payload.get("data") or []
+            if not data:
+                for _, queued in pending:
+                    queued.cancel()
+                return
+            logger.info("Fetched %s proposals from page %s of %s", len(data), page, last_page)
+            yield from data
+            offset += len(data)
+
+    # Pick up anything published after page 1 was read.
+    yield from _fetch_serial(per_page, offset)
+
+
+def proposal_updated_at(raw: Dict[str, Any]) -> Optional[datetime]:
+    value = raw.get("updated_at") or raw.get("created_at")
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def fetch_updated_proposals(since: datetime, per_page: int = 60) -> Iterable[Dict[str, Any]]:
+    """Yield proposals updated at or after ``since``, newest first.
+
+    Pages are requested in ``-created_at`` order and paging stops at the first
+    proposal whose ``updated_at`` is older than ``since``. Older proposals
+    edited after that point are left to the periodic full reconcile.
+    """
+    for item in _fetch_serial(per_page, 0, sort="-created_at"):
+        updated_at = proposal_updated_at(item)
+        if updated_at is None or updated_at < since:
+            break
+        yield item
+
+
+def track_cursor(items: Iterable[Dict[str, Any]], cursor: List[Optional[datetime]]) -> Iterator[Dict[str, Any]]:
+    # Pass items through, keeping the newest updated_at in cursor[0].
+    for item in items:
+        updated_at = proposal_updated_at(item)
+        if updated_at is not None and (cursor[0] is None or updated_at > cursor[0]):
+            cursor[0] = updated_at
+        yield item
+
+
+def payload_hash(raw: Dict[str, Any]) -> str:
+    normalized = json.dumps(raw, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
 def transform_proposal(raw: Dict[str, Any]) -> Dict[str, Any]:
+    # content_changed_at only lands when the hash-guarded upsert rewrites the row.
+    now = datetime.now(timezone.utc)
     return {
         "proposal_id": raw.get("id"),
         "fund_id": raw.get("fund_id"),
@@ -95,41 +256,129 @@ def transform_proposal(raw: Dict[str, Any]) -> Dict[str, Any]:
         "proposal_url": raw.get("url"),
         "source_url": PROPOSALS_ENDPOINT,
         "source_type": "catalyst_explorer_api",
-        "last_seen_at": datetime.now(timezone.utc),
+        "last_seen_at": now,
         "raw_payload": raw,
+        "content_hash": payload_hash(raw),
+        "content_changed_at": now,
     }
 
 
-def upsert_proposals(rows: List[Dict[str, Any]]) -> None:
-    if not rows:
-        logger.info("No proposals to upsert")
-        return
-    engine = get_engine()
+def _upsert_batch(connection: Any, rows: List[Dict[str, Any]]) -> List[Tuple[int, bool]]:
+    stmt = insert(catalyst_proposals).values(rows)
+    update_cols = {column: stmt.excluded[column] for column in UPDATE_COLUMNS}
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["proposal_id"],
+        set_=update_cols,
+        where=catalyst_proposals.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+    ).returning(catalyst_proposals.c.proposal_id, literal_column("xmax = 0").label("inserted"))
+    return [(row.proposal_id, row.inserted) for row in connection.execute(stmt)]
+
+
+def _copy_batch(connection: Any, rows: List[Dict[str, Any]]) -> List[Tuple[int, bool]]:
+    connection.execute(text(CREATE_STAGING_SQL))
+    copy_rows(
+        connection,
+        "proposal_staging",
+        PROPOSAL_COLUMNS,
+        ([row[column] for column in PROPOSAL_COLUMNS] for row in rows),
+    )
+    return [(row.proposal_id, row.inserted) for row in connection.execute(text(MERGE_STAGING_SQL))]
+
+
+def _touch_unchanged(connection: Any, proposal_ids: List[int], seen_at: datetime) -> None:
+    if proposal_ids:
+        connection.execute(
+            update(catalyst_proposals)
+            .where(catalyst_proposals.c.proposal_id.in_(proposal_ids))
+            .values(last_seen_at=seen_at)
+        )
+
+
+def _batches(rows: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    # Keyed by proposal_id so a proposal repeated across shifting pages only
+    # lands once per statement (ON CONFLICT cannot touch a row twice).
+    batch: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        batch[row["proposal_id"]] = row
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def ensure_schema(engine: Any) -> None:
     metadata.create_all(engine)
     with engine.begin() as connection:
-        stmt = insert(catalyst_proposals).values(rows)
-        update_cols = {
-            "fund_id": stmt.excluded.fund_id,
-            "challenge_id": stmt.excluded.challenge_id,
-            "user_id": stmt.excluded.user_id,
-            "title": stmt.excluded.title,
-            "summary": stmt.excluded.summary,
-            "status": stmt.excluded.status,
-            "budget": stmt.excluded.budget,
-            "proposal_url": stmt.excluded.proposal_url,
-            "source_url": stmt.excluded.source_url,
-            "source_type": stmt.excluded.source_type,
-            "last_seen_at": stmt.excluded.last_seen_at,
-            "raw_payload": stmt.excluded.raw_payload,
-        }
-        connection.execute(stmt.on_conflict_do_update(index_elements=["proposal_id"], set_=update_cols))
-    logger.info("Upserted %s proposals", len(rows))
-
-
-def run() -> None:
+        connection.execute(text(ADD_CONTENT_HASH_SQL))
+        connection.execute(text(ADD_CONTENT_CHANGED_AT_SQL))
+        for index in catalyst_proposals.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def write_proposal_batch(engine: Any, batch: List[Dict[str, Any]], use_copy: bool = False) -> Tuple[int, int, int]:
+    # ``batch`` must hold each proposal_id at most once.
+    write_batch = _copy_batch if use_copy else _upsert_batch
+    with engine.begin() as connection:
+        written = write_batch(connection, batch)
+        written_ids = {proposal_id for proposal_id, _ in written}
+        unchanged_ids = [row["proposal_id"] for row in batch if row["proposal_id"] not in written_ids]
+        _touch_unchanged(connection, unchanged_ids, datetime.now(timezone.utc))
+    inserted = sum(1 for _, was_inserted in written if was_inserted)
+    return inserted, len(written) - inserted, len(unchanged_ids)
+
+
+def upsert_proposals(
+    rows: Iterable[Dict[str, Any]],
+    batch_size: int = UPSERT_BATCH_SIZE,
+    use_copy: bool = False,
+) -> Tuple[int, int, int]:
+    """Upsert ``rows`` into ``catalyst_proposals`` in batches of ``batch_size``.
+
+    Each batch is committed in its own transaction, so only one batch is held
+    in memory at a time. With ``use_copy`` a batch is loaded through ``COPY``
+    into a temporary staging table and merged with one ``INSERT ... SELECT``.
+
+    Existing rows are only rewritten when their ``content_hash`` differs;
+    unchanged rows just get ``last_seen_at`` bumped. Returns
+    ``(inserted, changed, untouched)``.
+    """
+    engine = get_engine()
+    ensure_schema(engine)
+    inserted = changed = untouched = 0
+    for batch in _batches(rows, batch_size):
+        batch_inserted, batch_changed, batch_untouched = write_proposal_batch(engine, batch, use_copy=use_copy)
+        inserted += batch_inserted
+        changed += batch_changed
+        untouched += batch_untouched
+        logger.info("Upserted %s proposals (%s total)", len(batch), inserted + changed + untouched)
+    logger.info("Proposals inserted: %s, changed: %s, untouched: %s", inserted, changed, untouched)
+    return inserted, changed, untouched
+
+
+def run(
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_size: int = UPSERT_BATCH_SIZE,
+    use_copy: bool = False,
+    full: bool = False,
+) -> None:
+    engine = get_engine()
+    ensure_sync_state(engine)
+    with engine.connect() as connection:
+        state = get_sync_state(connection, SYNC_SOURCE)
+    full = full or needs_full_sync(state, FULL_SYNC_INTERVAL)
+    since = None if full else state["cursor"]
+    cursor: List[Optional[datetime]] = [since]
+
     try:
-        proposals = [transform_proposal(item) for item in fetch_proposals()]
-        upsert_proposals(proposals)
+        if full:
+            logger.info("Running full proposal sync")
+            items = fetch_proposals(concurrency=concurrency)
+        else:
+            logger.info("Running incremental proposal sync from %s", since.isoformat())
+            items = fetch_updated_proposals(since)
+        proposals = (transform_proposal(item) for item in track_cursor(items, cursor))
+        upsert_proposals(proposals, batch_size=batch_size, use_copy=use_copy)
     except requests.RequestException as exc:
         logger.exception("HTTP error while fetching proposals: %s", exc)
         raise
@@ -137,6 +386,18 @@ def run() -> None:
         logger.exception("Unexpected error during proposal ingestion: %s", exc)
         raise
 
+    with engine.begin() as connection:
+        save_cursor(connection, SYNC_SOURCE, cursor[0], full_sync=full)
+
 
 if __name__ == "__main__":
-    run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest CatalystExplorer proposals")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Pages fetched in parallel")
+    parser.add_argument("--batch-size", type=int, default=UPSERT_BATCH_SIZE, help="Proposals per upsert transaction")
+    parser.add_argument("--copy", action="store_true", help="Load each batch through COPY into a staging table")
+    parser.add_argument("--full", action="store_true", help="Fetch every proposal instead of only updated ones")
+    args = parser.parse_args()
+
+    run(concurrency=args.concurrency, batch_size=args.batch_size, use_copy=args.copy, full=args.full)
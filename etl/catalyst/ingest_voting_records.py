@@ -1,16 +1,19 @@
 import logging
 import os
-import time
-from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import requests
 from dotenv import load_dotenv
-from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, bindparam, create_engine, select, update
 from sqlalchemy.dialects.postgresql import insert
 
+from catalyst.ingest_proposals import fetch_proposals, fetch_updated_proposals, track_cursor
+from common.sync_state import ensure_sync_state, get_sync_state, needs_full_sync, save_cursor
+
 BASE_URL = "https://www.catalystexplorer.com/api/v1"
 PROPOSALS_ENDPOINT = f"{BASE_URL}/proposals"
+SYNC_SOURCE = "catalyst_voting_records"
+FULL_SYNC_INTERVAL = timedelta(hours=24)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("catalyst.ingest.voting")
@@ -64,35 +67,6 @@ def get_engine() -> Any:
     return create_engine(database_url)
 
 
-def _get_with_retry(params: Dict[str, Any], retries: int = 3, backoff: float = 1.5) -> Dict[str, Any]:
-    attempt = 0
-    while True:
-        attempt += 1
-        try:
-            response = requests.get(PROPOSALS_ENDPOINT, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as exc:
-            if attempt >= retries:
-                raise
-            wait = backoff ** attempt
-            logger.warning("Request failed (attempt %s/%s): %s. Retrying in %.1fs", attempt, retries, exc, wait)
-            time.sleep(wait)
-
-
-def fetch_proposals(per_page: int = 60) -> Iterable[Dict[str, Any]]:
-    page = 1
-    while True:
-        payload = _get_with_retry({"per_page": per_page, "page": page})
-        data = payload.get("data") or []
-        if not data:
-            break
-        logger.info("Fetched %s proposals from page %s", len(data), page)
-        for item in data:
-            yield item
-        page += 1
-
-
 def resolve_category(raw: Dict[str, Any]) -> str:
     return (
         raw.get("challenge_title")
@@ -102,7 +76,7 @@ def resolve_category(raw: Dict[str, Any]) -> str:
     )
 
 
-def build_records(engine: Any) -> List[Dict[str, Any]]:
+def load_lookups(engine: Any) -> Tuple[Dict[int, str], Dict[str, Any]]:
     fund_lookup = {}
     with engine.begin() as connection:
         for row in connection.execute(select(funds.c.id, funds.c.number)).mappings():
@@ -115,53 +89,87 @@ def build_records(engine: Any) -> List[Dict[str, Any]]:
             if row["externalId"]:
                 project_lookup[str(row["externalId"])] = row
 
-    rows = []
-    captured_at = datetime.now(timezone.utc)
+    return fund_lookup, project_lookup
 
-    for proposal in fetch_proposals():
-        proposal_id = str(proposal.get("id"))
-        if proposal_id not in project_lookup:
-            continue
 
-        project = project_lookup[proposal_id]
-        fund_number = proposal.get("fund_id")
-        fund_id = project["fundId"] or (
-            fund_lookup.get(int(fund_number)) if fund_number is not None else None
-        )
-        if not fund_id:
-            continue
-
-        yes_votes = int(proposal.get("yes_votes_count") or 0)
-        no_votes = int(proposal.get("no_votes_count") or 0)
-        abstain_votes = int(proposal.get("abstain_votes_count") or 0)
-        total_cast = yes_votes + no_votes
-        approval_rate = yes_votes / total_cast if total_cast > 0 else 0.0
-
-        rows.append(
-            {
-                "id": f"vote_{proposal_id}_{int(captured_at.timestamp())}",
-                "projectId": project["id"],
-                "fundId": fund_id,
-                "category": resolve_category(proposal) or project.get("category") or "Uncategorized",
-                "yesVotes": yes_votes,
-                "noVotes": no_votes,
-                "abstainVotes": abstain_votes,
-                "uniqueWallets": int(proposal.get("unique_wallets") or 0),
-                "approvalRate": approval_rate,
-                "fundingProbability": approval_rate,
-                "fundRank": None,
-                "categoryRank": None,
-                "sourceUrl": proposal.get("url") or f"{PROPOSALS_ENDPOINT}/{proposal_id}",
-                "sourceType": "catalyst_explorer",
-                "capturedAt": captured_at,
-                "createdAt": captured_at,
-                "updatedAt": captured_at,
-            }
-        )
+def build_record(
+    proposal: Dict[str, Any],
+    fund_lookup: Dict[int, str],
+    project_lookup: Dict[str, Any],
+    captured_at: datetime,
+) -> Optional[Dict[str, Any]]:
+    proposal_id = str(proposal.get("id"))
+    if proposal_id not in project_lookup:
+        return None
 
+    project = project_lookup[proposal_id]
+    fund_number = proposal.get("fund_id")
+    fund_id = project["fundId"] or (
+        fund_lookup.get(int(fund_number)) if fund_number is not None else None
+    )
+    if not fund_id:
+        return None
+
+    yes_votes = int(proposal.get("yes_votes_count") or 0)
+    no_votes = int(proposal.get("no_votes_count") or 0)
+    abstain_votes = int(proposal.get("abstain_votes_count") or 0)
+    total_cast = yes_votes + no_votes
+    approval_rate = yes_votes / total_cast if total_cast > 0 else 0.0
+
+    return {
+        "id": f"vote_{proposal_id}_{int(captured_at.timestamp())}",
+        "projectId": project["id"],
+        "fundId": fund_id,
+        "category": resolve_category(proposal) or project.get("category") or "Uncategorized",
+        "yesVotes": yes_votes,
+        "noVotes": no_votes,
+        "abstainVotes": abstain_votes,
+        "uniqueWallets": int(proposal.get("unique_wallets") or 0),
+        "approvalRate": approval_rate,
+        "fundingProbability": approval_rate,
+        "fundRank": None,
+        "categoryRank": None,
+        "sourceUrl": proposal.get("url") or f"{PROPOSALS_ENDPOINT}/{proposal_id}",
+        "sourceType": "catalyst_explorer",
+        "capturedAt": captured_at,
+        "createdAt": captured_at,
+        "updatedAt": captured_at,
+    }
+
+
+def build_records(engine: Any, proposals: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    fund_lookup, project_lookup = load_lookups(engine)
+    captured_at = datetime.now(timezone.utc)
+    rows = []
+    for proposal in proposals:
+        record = build_record(proposal, fund_lookup, project_lookup, captured_at)
+        if record is not None:
+            rows.append(record)
     return rows
 
 
+def load_latest_votes(engine: Any, fund_ids: Iterable[str], skip_project_ids: Iterable[str]) -> List[Dict[str, Any]]:
+    # Latest stored record per project, so incremental rows are ranked
+    # against the whole fund rather than only the proposals that changed.
+    skip = set(skip_project_ids)
+    stmt = (
+        select(
+            voting_records.c.id,
+            voting_records.c.projectId,
+            voting_records.c.fundId,
+            voting_records.c.category,
+            voting_records.c.yesVotes,
+            voting_records.c.fundRank,
+            voting_records.c.categoryRank,
+        )
+        .where(voting_records.c.fundId.in_(list(fund_ids)))
+        .distinct(voting_records.c.projectId)
+        .order_by(voting_records.c.projectId, voting_records.c.capturedAt.desc())
+    )
+    with engine.connect() as connection:
+        return [dict(row) for row in connection.execute(stmt).mappings() if row["projectId"] not in skip]
+
+
 def assign_rankings(rows: List[Dict[str, Any]]) -> None:
     fund_groups: Dict[str, List[Dict[str, Any]]] = {}
     category_groups: Dict[str, List[Dict[str, Any]]] = {}
@@ -182,6 +190,18 @@ def assign_rankings(rows: List[Dict[str, Any]]) -> None:
             row["categoryRank"] = rank
 
 
+def rank_records(engine: Any, rows: List[Dict[str, Any]], full: bool) -> List[Dict[str, Any]]:
+    # Returns the stored latest records of other projects whose ranks moved,
+    # so the caller can rewrite them; a full sync re-ranks every project itself.
+    if full:
+        assign_rankings(rows)
+        return []
+    context = load_latest_votes(engine, {row["fundId"] for row in rows}, (row["projectId"] for row in rows))
+    previous = {row["id"]: (row["fundRank"], row["categoryRank"]) for row in context}
+    assign_rankings(rows + context)
+    return [row for row in context if previous[row["id"]] != (row["fundRank"], row["categoryRank"])]
+
+
 def upsert_records(rows: List[Dict[str, Any]]) -> None:
     if not rows:
         logger.info("No voting records to upsert")
@@ -196,12 +216,54 @@ def upsert_records(rows: List[Dict[str, Any]]) -> None:
     logger.info("Upserted %s voting records", len(rows))
 
 
-def run() -> None:
+def update_rankings(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+
+    stmt = (
+        update(voting_records)
+        .where(voting_records.c.id == bindparam("record_id"))
+        .values(fundRank=bindparam("fund_rank"), categoryRank=bindparam("category_rank"))
+    )
+    params = [
+        {"record_id": row["id"], "fund_rank": row["fundRank"], "category_rank": row["categoryRank"]}
+        for row in rows
+    ]
+    with get_engine().begin() as connection:
+        connection.execute(stmt, params)
+
+    logger.info("Re-ranked %s stored voting records", len(rows))
+
+
+def run(full: bool = False) -> None:
     engine = get_engine()
-    rows = build_records(engine)
-    assign_rankings(rows)
+    ensure_sync_state(engine)
+    with engine.connect() as connection:
+        state = get_sync_state(connection, SYNC_SOURCE)
+    full = full or needs_full_sync(state, FULL_SYNC_INTERVAL)
+    since = None if full else state["cursor"]
+    cursor: List[Optional[datetime]] = [since]
+
+    if full:
+        logger.info("Running full voting sync")
+        proposals = fetch_proposals()
+    else:
+        logger.info("Running incremental voting sync from %s", since.isoformat())
+        proposals = fetch_updated_proposals(since)
+    rows = build_records(engine, track_cursor(proposals, cursor))
+    reranked = rank_records(engine, rows, full)
     upsert_records(rows)
+    update_rankings(reranked)
+
+    with engine.begin() as connection:
+        save_cursor(connection, SYNC_SOURCE, cursor[0], full_sync=full)
 
 
 if __name__ == "__main__":
-    run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest Catalyst voting records")
+    parser.add_argument("--full", action="store_true", help="Fetch every proposal instead of only updated ones")
+    args = parser.parse_args()
+
+    run(full=args.full)
@@ -1,10 +1,37 @@
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List
-from urllib.parse import urlparse, urlunparse
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import ParseResult, urlparse, urlunparse
 
 URL_REGEX = re.compile(r"https?://[^\s)\]}>\"']+", re.IGNORECASE)
 
+# Registered domains (and all of their subdomains) mapped to LinkRecord types.
+DOMAIN_TYPES: Dict[str, str] = {
+    "github.com": "github_repo",
+    "youtube.com": "youtube",
+    "youtu.be": "youtube",
+    "twitter.com": "social",
+    "x.com": "social",
+    "medium.com": "blog",
+}
+DEFAULT_LINK_TYPE = "website"
+
+PROPOSAL_LINK_FIELDS = (
+    "summary",
+    "solution",
+    "problem",
+    "experience",
+    "website",
+    "link",
+    "ideascale_link",
+)
+# Text columns of catalyst_scraped_proposals rows.
+SCRAPED_LINK_FIELDS = ("summary", "body")
+EMBEDDED_LINKS_FIELD = "embedded_uris"
+
 
 @dataclass
 class LinkRecord:
@@ -12,65 +39,140 @@ class LinkRecord:
     type: str
 
 
+def _normalize_parsed(parsed: ParseResult) -> str:
+    return urlunparse(parsed._replace(query="", fragment=""))
+
+
 def normalize_url(raw_url: str) -> str:
-    parsed = urlparse(raw_url)
-    cleaned = parsed._replace(query="", fragment="")
-    return urlunparse(cleaned)
+    return _normalize_parsed(urlparse(raw_url))
+
+
+def classify_host(host: Optional[str]) -> str:
+    if not host:
+        return DEFAULT_LINK_TYPE
+    host = host.rstrip(".")
+    # Walk from the full host up to its parent domains: www.github.com -> github.com.
+    while True:
+        link_type = DOMAIN_TYPES.get(host)
+        if link_type is not None:
+            return link_type
+        dot = host.find(".")
+        if dot == -1:
+            return DEFAULT_LINK_TYPE
+        host = host[dot + 1:]
+
+
+def _netloc_hostname(netloc: str) -> str:
+    host = netloc.rpartition("@")[2]
+    if host.startswith("["):
+        return host[1:].partition("]")[0].lower()
+    return host.partition(":")[0].lower()
 
 
 def classify_url(url: str) -> str:
-    host = urlparse(url).netloc.lower()
-    if "github.com" in host:
-        return "github_repo"
-    if "youtube.com" in host or "youtu.be" in host:
-        return "youtube"
-    if "twitter.com" in host or "x.com" in host:
-        return "social"
-    if "medium.com" in host:
-        return "blog"
-    return "website"
+    return classify_host(urlparse(url).hostname)
+
+
+def build_link(raw_url: str) -> LinkRecord:
+    parsed = urlparse(raw_url)
+    return LinkRecord(url=_normalize_parsed(parsed), type=classify_host(parsed.hostname))
+
+
+def _build_matched_link(matched_url: str) -> LinkRecord:
+    # URL_REGEX only matches "http(s)://" followed by non-space characters,
+    # so the URL can be split once by hand instead of through urlparse.
+    scheme, _, rest = matched_url.partition("://")
+    for marker in "?#":
+        cut = rest.find(marker)
+        if cut != -1:
+            rest = rest[:cut]
+    netloc = rest.partition("/")[0]
+    if not netloc:
+        return build_link(matched_url)
+    path = rest[len(netloc):]
+    # urlunparse drops an empty ";params" section from the last path segment.
+    if path.endswith(";") and path.find(";", path.rfind("/")) == len(path) - 1:
+        rest = rest[:-1]
+    return LinkRecord(url=f"{scheme.lower()}://{rest}", type=classify_host(_netloc_hostname(netloc)))
 
 
 def extract_links(text: str) -> List[LinkRecord]:
-    links: List[LinkRecord] = []
-    for match in URL_REGEX.findall(text or ""):
-        normalized = normalize_url(match)
-        links.append(LinkRecord(url=normalized, type=classify_url(normalized)))
-    return links
-
-
-def extract_links_from_proposal(proposal: Dict[str, Any]) -> List[LinkRecord]:
-    fields = [
-        "summary",
-        "solution",
-        "problem",
-        "experience",
-        "website",
-        "link",
-        "ideascale_link",
-    ]
+    return [_build_matched_link(match) for match in URL_REGEX.findall(text or "")]
+
+
+def extract_links_from_proposal(
+    proposal: Dict[str, Any],
+    fields: Sequence[str] = PROPOSAL_LINK_FIELDS,
+) -> List[LinkRecord]:
     links: List[LinkRecord] = []
     for field in fields:
         value = proposal.get(field)
         if isinstance(value, str) and value.strip():
             links.extend(extract_links(value))
-    embedded = proposal.get("embedded_uris")
+    embedded = proposal.get(EMBEDDED_LINKS_FIELD)
     if isinstance(embedded, list):
         for item in embedded:
             if isinstance(item, str) and item.strip():
-                normalized = normalize_url(item)
-                links.append(LinkRecord(url=normalized, type=classify_url(normalized)))
+                links.append(build_link(item))
     deduped = {}
     for link in links:
         deduped[(link.url, link.type)] = link
     return list(deduped.values())
 
 
+def _extract_chunk(
+    chunk: List[Tuple[Any, Dict[str, Any]]],
+    fields: Sequence[str],
+) -> List[Tuple[Any, List[LinkRecord]]]:
+    return [(proposal_id, extract_links_from_proposal(source, fields)) for proposal_id, source in chunk]
+
+
+def _iter_chunks(
+    proposals: Iterable[Dict[str, Any]],
+    fields: Sequence[str],
+    chunk_size: int,
+) -> Iterator[List[Tuple[Any, Dict[str, Any]]]]:
+    # Only the scanned fields travel to workers, never the full payload.
+    keys = tuple(fields) + (EMBEDDED_LINKS_FIELD,)
+    sources = (
+        (proposal.get("id"), {key: proposal.get(key) for key in keys})
+        for proposal in proposals
+        if proposal.get("id") is not None
+    )
+    while True:
+        chunk = list(islice(sources, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_links_batch(
+    proposals: Iterable[Dict[str, Any]],
+    chunk_size: int = 500,
+    workers: int = 1,
+    fields: Sequence[str] = PROPOSAL_LINK_FIELDS,
+) -> Iterator[Tuple[Any, List[LinkRecord]]]:
+    """Yield ``(proposal_id, links)`` in input order, one chunk at a time.
+
+    With ``workers > 1`` chunks are extracted in a process pool; at most
+    ``2 * workers`` chunks are in flight, which bounds memory regardless of
+    how many proposals the iterable produces.
+    """
+    chunks = _iter_chunks(proposals, fields, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _extract_chunk(chunk, fields)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Any] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_extract_chunk, chunk, fields))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
 def extract_links_batch(proposals: Iterable[Dict[str, Any]]) -> Dict[int, List[LinkRecord]]:
-    output: Dict[int, List[LinkRecord]] = {}
-    for proposal in proposals:
-        proposal_id = proposal.get("id")
-        if proposal_id is None:
-            continue
-        output[int(proposal_id)] = extract_links_from_proposal(proposal)
-    return output
+    return {int(proposal_id): links for proposal_id, links in iter_links_batch(proposals)}
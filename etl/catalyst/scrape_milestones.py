@@ -14,12 +14,13 @@ import uuid
 from datetime import datetime, timezone
 from typing import Iterable, List, Optional, Set
 
-import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, create_engine, select
 from sqlalchemy.dialects.postgresql import JSONB
 
+from common.http_client import get as http_get
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("catalyst.scrape.milestones")
 
@@ -98,24 +99,18 @@ def normalize_url(url: str) -> str:
 
 def fetch_html(url: str) -> str:
     global _LAST_REQUEST_AT
-    attempt = 0
-    while True:
-        attempt += 1
-        try:
-            now = time.time()
-            wait_for = RATE_LIMIT_SECONDS - (now - _LAST_REQUEST_AT)
-            if wait_for > 0:
-                time.sleep(wait_for)
-            response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            _LAST_REQUEST_AT = time.time()
-            return response.text
-        except requests.RequestException as exc:
-            if attempt >= MAX_RETRIES:
-                raise
-            wait = 1.5 ** attempt
-            logger.warning("Failed to fetch %s (attempt %s/%s): %s. Retrying in %.1fs", url, attempt, MAX_RETRIES, exc, wait)
-            time.sleep(wait)
+    wait_for = RATE_LIMIT_SECONDS - (time.time() - _LAST_REQUEST_AT)
+    if wait_for > 0:
+        time.sleep(wait_for)
+    response = http_get(
+        url,
+        headers={"User-Agent": USER_AGENT},
+        timeout=REQUEST_TIMEOUT,
+        retries=MAX_RETRIES,
+        cached=True,
+    )
+    _LAST_REQUEST_AT = time.time()
+    return response.text
 
 
 def _extract_pagination_links(soup: BeautifulSoup, base_url: str) -> Set[str]:
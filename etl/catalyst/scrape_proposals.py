@@ -6,12 +6,13 @@ import time
 from datetime import datetime, timezone
 from typing import Iterable, List, Optional, Set
 
-import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, create_engine
 from sqlalchemy.dialects.postgresql import JSONB
 
+from common.http_client import get as http_get
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("catalyst.scrape.proposals")
 
@@ -54,19 +55,14 @@ def normalize_url(url: str) -> str:
 
 
 def fetch_html(url: str) -> str:
-    attempt = 0
-    while True:
-        attempt += 1
-        try:
-            response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            return response.text
-        except requests.RequestException as exc:
-            if attempt >= MAX_RETRIES:
-                raise
-            wait = 1.5 ** attempt
-            logger.warning("Failed to fetch %s (attempt %s/%s): %s. Retrying in %.1fs", url, attempt, MAX_RETRIES, exc, wait)
-            time.sleep(wait)
+    response = http_get(
+        url,
+        headers={"User-Agent": USER_AGENT},
+        timeout=REQUEST_TIMEOUT,
+        retries=MAX_RETRIES,
+        cached=True,
+    )
+    return response.text
 
 
 def extract_fund_slug(url: str) -> Optional[str]:
@@ -0,0 +1,117 @@
+"""
+On-disk HTTP response cache backed by SQLite.
+
+Entries are keyed by the full request URL and keep the response's ETag and
+Last-Modified validators so the next request can be conditional. Bodies are
+zlib-compressed; once the stored bodies exceed ``max_bytes`` the least
+recently used entries are evicted.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    encoding TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+    encoding: Optional[str]
+    body: bytes
+    expires_at: Optional[float]
+
+    def is_fresh(self) -> bool:
+        return self.expires_at is not None and self.expires_at > time.time()
+
+
+class HttpCache:
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA_SQL)
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, content_type, encoding, body, expires_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        etag, last_modified, content_type, encoding, body, expires_at = row
+        return CachedResponse(etag, last_modified, content_type, encoding, zlib.decompress(body), expires_at)
+
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_type: Optional[str] = None,
+        encoding: Optional[str] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        compressed = zlib.compress(body, 6)
+        if len(compressed) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, etag, last_modified, content_type, encoding, body, size, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, content_type, encoding, compressed, len(compressed), expires_at, time.time()),
+            )
+            self._total += len(compressed) - (previous[0] if previous else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def refresh(self, key: str, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET expires_at = ?, last_used = ? WHERE key = ?",
+                (expires_at, time.time(), key),
+            )
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until the cache is back under 90%
+        # of max_bytes, so a full cache does not evict on every write.
+        target = int(self.max_bytes * 0.9)
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total <= target:
+                break
+            evicted.append((key,))
+            self._total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
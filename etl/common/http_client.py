@@ -0,0 +1,252 @@
+"""
+Shared HTTP client for ETL fetchers.
+
+One pooled ``requests.Session`` keeps connections alive per host, and every
+request goes through the same retry policy: connection errors and retryable
+statuses back off exponentially, honouring ``Retry-After`` when present. A
+GitHub-style primary rate limit waits out the whole ``X-RateLimit-Reset``. ``requests`` speaks HTTP/1.1 only,
+so keep-alive reuse is what saves the TCP and TLS handshakes.
+
+Callers that pass ``cached=True`` read through the on-disk cache in
+``common/http_cache.py``: stored ETag/Last-Modified validators are sent as
+conditional headers and a 304 is answered from the cache.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from common.http_cache import CachedResponse, HttpCache
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.5
+CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+MAX_RETRY_WAIT = 900.0
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 16
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+ETL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(ETL_DIR, ".cache", "http_cache.sqlite")
+DEFAULT_CACHE_MAX_MB = 512
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+# Read timeouts by hostname from HTTP_HOST_TIMEOUTS ("host=seconds,...");
+# anything else uses DEFAULT_READ_TIMEOUT.
+_host_timeouts: Optional[Dict[str, float]] = None
+
+logger = logging.getLogger("common.http")
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_cache: Optional[HttpCache] = None
+_cache_loaded = False
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_cache() -> Optional[HttpCache]:
+    """Return the shared response cache, or None when ``HTTP_CACHE_PATH`` is set empty."""
+    global _cache, _cache_loaded
+    if not _cache_loaded:
+        with _session_lock:
+            if not _cache_loaded:
+                load_dotenv()
+                path = os.getenv("HTTP_CACHE_PATH", DEFAULT_CACHE_PATH)
+                if path:
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                    max_mb = int(os.getenv("HTTP_CACHE_MAX_MB", str(DEFAULT_CACHE_MAX_MB)))
+                    _cache = HttpCache(path, max_bytes=max_mb * 1024 * 1024)
+                _cache_loaded = True
+    return _cache
+
+
+def get_host_timeouts() -> Dict[str, float]:
+    global _host_timeouts
+    if _host_timeouts is None:
+        with _session_lock:
+            if _host_timeouts is None:
+                load_dotenv()
+                timeouts: Dict[str, float] = {}
+                for entry in os.getenv("HTTP_HOST_TIMEOUTS", "").split(","):
+                    if not entry.strip():
+                        continue
+                    host, separator, seconds = entry.partition("=")
+                    if not separator:
+                        raise ValueError(f"Invalid HTTP_HOST_TIMEOUTS entry {entry!r}; expected host=seconds")
+                    timeouts[host.strip().lower()] = float(seconds)
+                _host_timeouts = timeouts
+    return _host_timeouts
+
+
+def _timeout_for(url: str, timeout: Optional[Timeout]) -> Timeout:
+    if timeout is None:
+        timeout = get_host_timeouts().get((urlparse(url).hostname or "").lower(), DEFAULT_READ_TIMEOUT)
+    if isinstance(timeout, tuple):
+        return timeout
+    return (min(CONNECT_TIMEOUT, timeout), timeout)
+
+
+def is_rate_limited(response: requests.Response) -> bool:
+    return response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0"
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    reset = response.headers.get("X-RateLimit-Reset")
+    if reset and response.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            return max(1.0, float(reset) - time.time())
+        except ValueError:
+            pass
+    return None
+
+
+def _expires_at(response: requests.Response) -> Optional[float]:
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return None
+    match = MAX_AGE_PATTERN.search(cache_control)
+    return time.time() + int(match.group(1)) if match else None
+
+
+def _store(cache: HttpCache, key: str, response: requests.Response) -> None:
+    if "no-store" in response.headers.get("Cache-Control", "").lower():
+        return
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    expires_at = _expires_at(response)
+    if etag or last_modified or expires_at:
+        cache.put(
+            key,
+            response.content,
+            etag=etag,
+            last_modified=last_modified,
+            content_type=response.headers.get("Content-Type"),
+            encoding=response.encoding,
+            expires_at=expires_at,
+        )
+
+
+def _cached_response(entry: CachedResponse, url: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = entry.body
+    response.encoding = entry.encoding
+    if entry.content_type:
+        response.headers["Content-Type"] = entry.content_type
+    return response
+
+
+def request(
+    method: str,
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    json: Any = None,
+    timeout: Optional[Timeout] = None,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    compress: bool = True,
+    cached: bool = False,
+) -> requests.Response:
+    """Send ``method`` to ``url`` on the shared session and return the successful response.
+
+    Raises the last ``requests.RequestException`` once ``retries`` attempts
+    are used up. ``compress=False`` asks the server for an uncompressed body.
+    With ``cached=True`` (GET only) the request is conditional on any cached
+    copy, and a copy still inside its ``max-age`` is returned without a request.
+    """
+    request_headers = dict(headers or {})
+    if not compress:
+        request_headers["Accept-Encoding"] = "identity"
+
+    cache = get_cache() if cached and method == "GET" else None
+    cache_key = requests.Request("GET", url, params=params).prepare().url if cache else None
+    entry = cache.get(cache_key) if cache else None
+    if entry is not None:
+        if entry.is_fresh():
+            return _cached_response(entry, cache_key)
+        if entry.etag:
+            request_headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            request_headers["If-Modified-Since"] = entry.last_modified
+
+    session = get_session()
+    attempt = 0
+    while True:
+        attempt += 1
+        wait = backoff ** attempt
+        try:
+            response = session.request(
+                method,
+                url,
+                params=params,
+                headers=request_headers,
+                json=json,
+                timeout=_timeout_for(url, timeout),
+            )
+            if attempt < retries and (response.status_code in RETRY_STATUSES or is_rate_limited(response)):
+                retry_after = retry_after_seconds(response)
+                if retry_after is not None:
+                    # A primary rate limit only lifts at its reset, up to an hour away.
+                    wait = retry_after if is_rate_limited(response) else min(retry_after, MAX_RETRY_WAIT)
+                response.close()
+                message = f"{response.status_code} {response.reason} for url: {response.url}"
+                raise requests.HTTPError(message, response=response)
+            if response.status_code == 304 and entry is not None:
+                cache.refresh(cache_key, _expires_at(response))
+                return _cached_response(entry, cache_key)
+            response.raise_for_status()
+            if cache is not None and response.status_code == 200:
+                _store(cache, cache_key, response)
+            return response
+        except requests.RequestException as exc:
+            retryable = exc.response is None or exc.response.status_code in RETRY_STATUSES or is_rate_limited(exc.response)
+            if attempt >= retries or not retryable:
+                raise
+            logger.warning("Request to %s failed (attempt %s/%s): %s. Retrying in %.1fs", url, attempt, retries, exc, wait)
+            time.sleep(wait)
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def get_json(url: str, **kwargs: Any) -> Any:
+    return request("GET", url, **kwargs).json()
+
+
+def post_json(url: str, payload: Any, **kwargs: Any) -> Any:
+    return request("POST", url, json=payload, **kwargs).json()
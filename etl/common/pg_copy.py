@@ -0,0 +1,64 @@
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence
+
+COPY_FLUSH_ROWS = 5000
+
+
+def _text_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        text = "t" if value else "f"
+    elif isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        text = json.dumps(value)
+    else:
+        text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(
+    connection: Any,
+    table_name: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> int:
+    """Stream ``rows`` into ``table_name`` with ``COPY ... FROM STDIN``.
+
+    ``connection`` is a SQLAlchemy connection on a psycopg (3) or psycopg2
+    engine; the copy runs inside its current transaction. Dicts and lists are
+    written as JSON text, so they can target json/jsonb columns.
+    """
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    sql = f'COPY "{table_name}" ({column_list}) FROM STDIN'
+    driver_connection = connection.connection.driver_connection
+    count = 0
+    with driver_connection.cursor() as cursor:
+        if hasattr(cursor, "copy"):
+            with cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write("\t".join(_text_value(value) for value in row) + "\n")
+                    count += 1
+            return count
+
+        # psycopg2 has no incremental COPY writer, so flush in fixed-size chunks.
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_text_value(value) for value in row) + "\n")
+            count += 1
+            if count % COPY_FLUSH_ROWS == 0:
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                buffer = io.StringIO()
+        if buffer.tell():
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+    return count
@@ -0,0 +1,92 @@
+"""
+Header-driven rate-limit budgets for asyncio fetchers.
+
+A ``TokenBucket`` tracks one credential's remaining requests and reset time as
+reported by the API (``X-RateLimit-Remaining`` / ``X-RateLimit-Reset``). It
+lets calls through freely while the budget is comfortable, then spreads the
+rest of the budget evenly up to the reset so the window is used in full
+without tripping the limit. ``Retry-After`` pauses it outright.
+"""
+
+import asyncio
+import time
+from typing import Any, Generic, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+DEFAULT_PACE_BELOW = 100
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    def __init__(self, capacity: int, period: float, pace_below: int = DEFAULT_PACE_BELOW):
+        self.capacity = capacity
+        self.period = period
+        self.pace_below = pace_below
+        self.remaining = capacity
+        self.reset_at = time.time() + period
+        self.paused_until = 0.0
+        self.last_at = 0.0
+
+    def _roll(self, now: float) -> None:
+        # Assume a fresh window once the reported reset time has passed.
+        if now >= self.reset_at:
+            self.remaining = self.capacity
+            self.reset_at = now + self.period
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds to wait before the next call may go out."""
+        now = time.time() if now is None else now
+        self._roll(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.remaining <= 0:
+            return max(wait, self.reset_at - now)
+        if self.remaining <= self.pace_below:
+            interval = (self.reset_at - now) / self.remaining
+            wait = max(wait, self.last_at + interval - now)
+        return wait
+
+    def consume(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self._roll(now)
+        self.last_at = now
+        self.remaining -= 1
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.time() + seconds)
+
+    def update(self, headers: Mapping[str, Any]) -> None:
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_at = float(headers["X-RateLimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if reset_at > self.reset_at + 1:
+            # A new window: trust the server's count.
+            self.remaining = remaining
+        else:
+            # Same window: requests still in flight are already counted locally.
+            self.remaining = min(self.remaining, remaining)
+        self.reset_at = reset_at
+
+
+class BucketPool(Generic[T]):
+    """Hand out whichever credential's bucket can go soonest."""
+
+    def __init__(self, credentials: Sequence[T], capacity: int, period: float, pace_below: int = DEFAULT_PACE_BELOW):
+        if not credentials:
+            raise ValueError("BucketPool needs at least one credential")
+        self.entries: List[Tuple[T, TokenBucket]] = [
+            (credential, TokenBucket(capacity, period, pace_below)) for credential in credentials
+        ]
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> Tuple[T, TokenBucket]:
+        async with self._lock:
+            while True:
+                now = time.time()
+                credential, bucket = min(self.entries, key=lambda entry: entry[1].delay(now))
+                wait = bucket.delay(now)
+                if wait <= 0:
+                    bucket.consume(now)
+                    return credential, bucket
+                await asyncio.sleep(wait)
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.dialects.postgresql import insert
+
+metadata = MetaData()
+
+etl_sync_state = Table(
+    "etl_sync_state",
+    metadata,
+    Column("source", String, primary_key=True),
+    Column("cursor", DateTime(timezone=True), nullable=True),
+    Column("last_full_sync_at", DateTime(timezone=True), nullable=True),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def ensure_sync_state(engine: Any) -> None:
+    metadata.create_all(engine)
+
+
+def get_sync_state(connection: Any, source: str) -> Optional[Dict[str, Any]]:
+    row = connection.execute(
+        select(etl_sync_state).where(etl_sync_state.c.source == source)
+    ).mappings().first()
+    return dict(row) if row else None
+
+
+def needs_full_sync(state: Optional[Dict[str, Any]], interval: timedelta) -> bool:
+    # No cursor yet, never reconciled, or the last reconcile is too old.
+    if not state or state["cursor"] is None or state["last_full_sync_at"] is None:
+        return True
+    return datetime.now(timezone.utc) - state["last_full_sync_at"] >= interval
+
+
+def get_cursor(connection: Any, source: str) -> Optional[datetime]:
+    state = get_sync_state(connection, source)
+    return state["cursor"] if state else None
+
+
+def save_cursor(
+    connection: Any,
+    source: str,
+    cursor: Optional[datetime],
+    full_sync: bool = False,
+) -> None:
+    now = datetime.now(timezone.utc)
+    values: Dict[str, Any] = {"source": source, "cursor": cursor, "updated_at": now}
+    if full_sync:
+        values["last_full_sync_at"] = now
+    stmt = insert(etl_sync_state).values(**values)
+    update_cols = {key: stmt.excluded[key] for key in values if key != "source"}
+    connection.execute(stmt.on_conflict_do_update(index_elements=["source"], set_=update_cols))
@@ -0,0 +1,153 @@
+"""
+Change-only writes for metric time series.
+
+A series is every row sharing ``key_column`` (e.g. one ``link_id``). A new
+point is written only when one of the tracked values differs from the
+series' current point; otherwise the current point's ``last_confirmed_at``
+is bumped. ``captured_at`` is when a value was first seen and
+``last_confirmed_at`` the last time it was observed unchanged.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import Table, bindparam, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+DOWNSAMPLE_UNITS = ("day", "week")
+
+ADD_LAST_CONFIRMED_SQL = "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS last_confirmed_at TIMESTAMPTZ"
+
+# Keep the last point of each series per bucket.
+DOWNSAMPLE_SQL = """
+WITH ranked AS (
+    SELECT id,
+           row_number() OVER (
+               PARTITION BY {key_column}, date_trunc(:unit, captured_at)
+               ORDER BY captured_at DESC, id DESC
+           ) AS position
+    FROM {table}
+    WHERE captured_at < :before
+)
+DELETE FROM {table} AS point
+USING ranked
+WHERE point.id = ranked.id
+  AND ranked.position > 1{keep_shared}
+"""
+
+# Rows another row points at through raw_payload.payload_id still hold a
+# shared payload, so they stay. Tables that share payloads index this
+# expression (see PAYLOAD_REF_EXPRESSION).
+KEEP_SHARED_SQL = """
+  AND NOT EXISTS (
+      SELECT 1 FROM {table} AS ref WHERE (ref.raw_payload ->> 'payload_id') = point.id
+  )"""
+
+PAYLOAD_REF_EXPRESSION = "(raw_payload ->> 'payload_id')"
+
+
+def ensure_timeseries_columns(connection: Any, table: Table) -> None:
+    connection.execute(text(ADD_LAST_CONFIRMED_SQL.format(table=table.name)))
+
+
+def point_id(prefix: str, series_key: str, captured_at: datetime) -> str:
+    # Deterministic, so a retried write cannot add the same point twice.
+    return f"{prefix}_{series_key}_{int(captured_at.timestamp())}"
+
+
+def current_points(
+    connection: Any,
+    table: Table,
+    key_column: str,
+    tracked: Sequence[str],
+    keys: Sequence[Any],
+) -> Dict[Any, Dict[str, Any]]:
+    """Latest point per series for ``keys``, with only the id and tracked columns."""
+    if not keys:
+        return {}
+    key = table.c[key_column]
+    columns = [table.c.id, key, *[table.c[field] for field in tracked]]
+    stmt = (
+        select(*columns)
+        .where(key.in_(list(keys)))
+        .order_by(key, table.c.captured_at.desc())
+        .distinct(key)
+    )
+    return {row[key_column]: dict(row) for row in connection.execute(stmt).mappings()}
+
+
+def split_changed(
+    connection: Any,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    key_column: str,
+    tracked: Sequence[str],
+    refreshed: Sequence[str] = (),
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Return the rows that start a new point and the points merely confirmed.
+
+    Each confirmed point is ``{"id": ..., **refreshed}``: the ``refreshed``
+    columns are untracked values (e.g. an ETag) copied from the incoming row.
+    ``write_points`` stores them unless they are None.
+    """
+    current = current_points(connection, table, key_column, tracked, [row[key_column] for row in rows])
+    changed: List[Dict[str, Any]] = []
+    confirmed: List[Dict[str, Any]] = []
+    for row in rows:
+        point = current.get(row[key_column])
+        if point is not None and all(point[field] == row[field] for field in tracked):
+            confirmed.append({"id": point["id"], **{column: row[column] for column in refreshed}})
+        else:
+            changed.append(row)
+    return changed, confirmed
+
+
+def write_points(
+    connection: Any,
+    table: Table,
+    changed: Sequence[Dict[str, Any]],
+    confirmed: Sequence[Dict[str, Any]],
+    confirmed_at: datetime,
+) -> Tuple[int, int]:
+    if changed:
+        rows = [{**row, "last_confirmed_at": confirmed_at} for row in changed]
+        connection.execute(insert(table).values(rows).on_conflict_do_nothing(index_elements=["id"]))
+    refreshed = [column for column in confirmed[0] if column != "id"] if confirmed else []
+    if refreshed:
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("point_id"))
+            .values(
+                last_confirmed_at=confirmed_at,
+                **{column: func.coalesce(bindparam(f"new_{column}"), table.c[column]) for column in refreshed},
+            )
+        )
+        params = [
+            {"point_id": point["id"], **{f"new_{column}": point[column] for column in refreshed}} for point in confirmed
+        ]
+        connection.execute(stmt, params)
+    elif confirmed:
+        ids = [point["id"] for point in confirmed]
+        connection.execute(update(table).where(table.c.id.in_(ids)).values(last_confirmed_at=confirmed_at))
+    return len(changed), len(confirmed)
+
+
+def downsample(
+    connection: Any,
+    table: Table,
+    key_column: str,
+    unit: str,
+    before: datetime,
+    shared_payloads: bool = False,
+) -> int:
+    """Keep one point per series per ``unit`` ("day" or "week") among points older than ``before``.
+
+    With ``shared_payloads``, points still referenced through
+    ``raw_payload.payload_id`` are kept as well.
+    """
+    if unit not in DOWNSAMPLE_UNITS:
+        raise ValueError(f"Unknown downsample unit {unit!r}; expected one of {', '.join(DOWNSAMPLE_UNITS)}")
+    keep_shared = KEEP_SHARED_SQL.format(table=table.name) if shared_payloads else ""
+    sql = DOWNSAMPLE_SQL.format(table=table.name, key_column=key_column, keep_shared=keep_shared)
+    result = connection.execute(text(sql), {"unit": unit, "before": before})
+    return result.rowcount
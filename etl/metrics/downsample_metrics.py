@@ -0,0 +1,54 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+from common.timeseries import downsample
+from metrics.github_metrics import ensure_schema as ensure_github_schema
+from metrics.github_metrics import github_metrics
+from metrics.youtube_metrics import ensure_schema as ensure_youtube_schema
+from metrics.youtube_metrics import youtube_metrics
+
+DAILY_AFTER_DAYS = 30
+WEEKLY_AFTER_DAYS = 180
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger("metrics.downsample")
+
+
+def get_engine() -> Any:
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL is required to run metrics")
+    return create_engine(database_url)
+
+
+def run(daily_after_days: int = DAILY_AFTER_DAYS, weekly_after_days: int = WEEKLY_AFTER_DAYS) -> None:
+    """Compact metric points to daily resolution past ``daily_after_days`` and weekly past ``weekly_after_days``."""
+    engine = get_engine()
+    ensure_github_schema(engine)
+    ensure_youtube_schema(engine)
+    now = datetime.now(timezone.utc)
+    passes = (("day", now - timedelta(days=daily_after_days)), ("week", now - timedelta(days=weekly_after_days)))
+
+    # Only GitHub rows share payloads through raw_payload.payload_id.
+    for table, shared_payloads in ((github_metrics, True), (youtube_metrics, False)):
+        for unit, before in passes:
+            with engine.begin() as connection:
+                removed = downsample(connection, table, "link_id", unit, before, shared_payloads=shared_payloads)
+            logger.info("%s: removed %s points older than %s at %s resolution", table.name, removed, before.date(), unit)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact old GitHub/YouTube metric points")
+    parser.add_argument("--daily-after", type=int, default=DAILY_AFTER_DAYS, help="Keep one point per day past this many days")
+    parser.add_argument("--weekly-after", type=int, default=WEEKLY_AFTER_DAYS, help="Keep one point per week past this many days")
+    args = parser.parse_args()
+
+    run(daily_after_days=args.daily_after, weekly_after_days=args.weekly_after)
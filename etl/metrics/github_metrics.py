@@ -1,17 +1,41 @@
+import asyncio
 import logging
 import os
-import time
-import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from urllib.parse import urlparse
 
 import requests
 from dotenv import load_dotenv
-from sqlalchemy import JSON, Column, DateTime, Integer, MetaData, String, Table, create_engine, select
-from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, MetaData, String, Table, create_engine, func, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from common.http_client import RETRY_STATUSES, is_rate_limited, post_json, request, retry_after_seconds
+from common.rate_limit import BucketPool
+from common.timeseries import PAYLOAD_REF_EXPRESSION, ensure_timeseries_columns, point_id, split_changed, write_points
 
 GITHUB_API_BASE = "https://api.github.com"
+GITHUB_GRAPHQL_URL = f"{GITHUB_API_BASE}/graphql"
+GRAPHQL_BATCH_SIZE = 100
+REST_HOURLY_LIMIT = 5000
+SECONDARY_LIMIT_PAUSE = 60.0
+METRIC_FIELDS = ("repo_full_name", "stars", "forks", "open_issues", "watchers")
+GITHUB_HOSTS = frozenset({"github.com", "www.github.com"})
+# First path segments on github.com that are site pages, not repository owners.
+NON_REPO_OWNERS = frozenset({"orgs", "sponsors", "topics", "features", "marketplace", "settings", "apps", "collections"})
+ADD_ETAG_SQL = "ALTER TABLE github_repo_metrics ADD COLUMN IF NOT EXISTS etag VARCHAR"
+
+# open_issues mirrors REST's open_issues_count, which counts open PRs too.
+REPO_FIELDS_FRAGMENT = """
+fragment RepoFields on Repository {
+  nameWithOwner
+  stargazerCount
+  forkCount
+  issues(states: OPEN) { totalCount }
+  pullRequests(states: OPEN) { totalCount }
+  watchers { totalCount }
+}
+"""
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("metrics.github")
@@ -33,6 +57,16 @@ github_metrics = Table(
     Column("source_url", String, nullable=False),
     Column("source_type", String, nullable=False),
     Column("raw_payload", JSONB, nullable=False),
+    Column("etag", String),
+    Column("last_confirmed_at", DateTime(timezone=True)),
+    # Current point per link (change-only writes and impact scoring).
+    Index("ix_github_repo_metrics_link_captured", "link_id", "captured_at"),
+    # Rows that share another row's payload, so downsampling can keep it.
+    Index(
+        "ix_github_repo_metrics_payload_ref",
+        text(PAYLOAD_REF_EXPRESSION),
+        postgresql_where=text(f"{PAYLOAD_REF_EXPRESSION} IS NOT NULL"),
+    ),
 )
 
 
@@ -44,6 +78,15 @@ def get_engine() -> Any:
     return create_engine(database_url)
 
 
+def ensure_schema(engine: Any) -> None:
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text(ADD_ETAG_SQL))
+        ensure_timeseries_columns(connection, github_metrics)
+        for index in github_metrics.indexes:
+            index.create(connection, checkfirst=True)
+
+
 def get_github_token() -> str:
     token = os.getenv("GITHUB_TOKEN")
     if not token:
@@ -51,45 +94,271 @@ def get_github_token() -> str:
     return token
 
 
+def get_github_tokens() -> List[str]:
+    # GITHUB_TOKENS (comma-separated) lets the async fetcher rotate credentials.
+    tokens = [token.strip() for token in os.getenv("GITHUB_TOKENS", "").split(",") if token.strip()]
+    return tokens or [get_github_token()]
+
+
 def parse_repo_from_url(url: str) -> Optional[str]:
+    """Return the lower-cased ``owner/name`` a GitHub URL points at, or None.
+
+    GitHub names are case-insensitive, so ``Org/Repo``, ``org/repo.git`` and
+    ``org/repo/tree/main`` all map to ``org/repo``.
+    """
     try:
-        parsed = urlparse(url)
+        parsed = urlparse(url.strip())
     except ValueError:
         return None
-    if "github.com" not in parsed.netloc.lower():
+    if (parsed.hostname or "").lower() not in GITHUB_HOSTS:
         return None
     parts = [p for p in parsed.path.split("/") if p]
-    if len(parts) < 2:
+    if len(parts) < 2 or parts[0].lower() in NON_REPO_OWNERS:
         return None
-    return f"{parts[0]}/{parts[1]}"
+    owner, name = parts[0], parts[1]
+    if name.lower().endswith(".git"):
+        name = name[:-4]
+    if not name:
+        return None
+    return f"{owner}/{name}".lower()
 
 
-def fetch_github_repo(repo: str, token: str, retries: int = 3) -> Dict[str, Any]:
+def _rest_headers(token: str, etag: Optional[str] = None) -> Dict[str, str]:
     headers = {
         "Accept": "application/vnd.github+json",
         "Authorization": f"Bearer {token}",
         "X-GitHub-Api-Version": "2022-11-28",
     }
+    if etag:
+        headers["If-None-Match"] = etag
+    return headers
+
+
+def _repo_payload(response: requests.Response) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    # A 304 carries no body; the caller reuses what it stored for that ETag.
+    if response.status_code == 304:
+        return None, response.headers.get("ETag")
+    return response.json(), response.headers.get("ETag")
+
+
+def fetch_github_repo(
+    repo: str,
+    token: str,
+    retries: int = 3,
+    etag: Optional[str] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Return ``(payload, etag)`` for ``repo``; payload is None when ``etag`` still matches."""
     url = f"{GITHUB_API_BASE}/repos/{repo}"
+    response = request("GET", url, headers=_rest_headers(token, etag), retries=retries, backoff=2)
+    return _repo_payload(response)
 
-    for attempt in range(1, retries + 1):
-        response = requests.get(url, headers=headers, timeout=30)
-        if response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
-            reset = int(response.headers.get("X-RateLimit-Reset", "0"))
-            wait_seconds = max(1, reset - int(time.time()))
-            logger.warning("Rate limit reached. Sleeping for %ss", wait_seconds)
-            time.sleep(wait_seconds)
-            continue
+
+def _is_secondary_limited(response: requests.Response) -> bool:
+    # Secondary limits are 403s (or 429s) that may lack Retry-After; the body says which.
+    if response.status_code not in (403, 429) or is_rate_limited(response):
+        return False
+    return "secondary rate limit" in response.text.lower()
+
+
+async def _fetch_repo_async(
+    repo: str,
+    pool: BucketPool[str],
+    semaphore: asyncio.Semaphore,
+    retries: int = 3,
+    etag: Optional[str] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    url = f"{GITHUB_API_BASE}/repos/{repo}"
+    failures = 0
+    async with semaphore:
+        while True:
+            token, bucket = await pool.acquire()
+            try:
+                response = await asyncio.to_thread(request, "GET", url, headers=_rest_headers(token, etag), retries=1)
+            except requests.RequestException as exc:
+                response = exc.response
+                if response is not None:
+                    bucket.update(response.headers)
+                    retry_after = retry_after_seconds(response)
+                    if (
+                        is_rate_limited(response)
+                        or response.status_code == 429
+                        or (response.status_code == 403 and retry_after is not None)
+                        or _is_secondary_limited(response)
+                    ):
+                        # Primary limits are handled by update(); secondary
+                        # limits only say how long to back off this token.
+                        if not is_rate_limited(response):
+                            bucket.pause(retry_after if retry_after is not None else SECONDARY_LIMIT_PAUSE)
+                        logger.warning("Token rate-limited on %s; rotating", repo)
+                        continue
+                    if response.status_code not in RETRY_STATUSES:
+                        raise
+                failures += 1
+                if failures >= retries:
+                    raise
+                await asyncio.sleep(2 ** failures)
+                continue
+            bucket.update(response.headers)
+            return _repo_payload(response)
+
+
+async def fetch_repos_async(
+    repos: Sequence[str],
+    tokens: Sequence[str],
+    concurrency: int,
+    etags: Optional[Dict[str, str]] = None,
+) -> Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Fetch REST payloads for ``repos`` with at most ``concurrency`` requests in flight.
+
+    Every token gets its own bucket fed by the rate-limit headers; each
+    request goes out on whichever token can send soonest.
+    """
+    etags = etags or {}
+    pool: BucketPool[str] = BucketPool(tokens, capacity=REST_HOURLY_LIMIT, period=3600)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(repo: str) -> Tuple[str, Optional[Tuple[Optional[Dict[str, Any]], Optional[str]]]]:
+        try:
+            return repo, await _fetch_repo_async(repo, pool, semaphore, etag=etags.get(repo))
+        except requests.RequestException as exc:
+            logger.warning("Skipping %s: %s", repo, exc)
+            return repo, None
+
+    results = await asyncio.gather(*(fetch(repo) for repo in repos))
+    return {repo: result for repo, result in results if result is not None}
+
+
+def fetch_rest_metrics(
+    repos: Sequence[str],
+    tokens: Sequence[str],
+    concurrency: int = 1,
+    previous: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch REST metrics, sending ``If-None-Match`` for repos in ``previous``.
+
+    A 304 costs no rate-limit points; those repos reuse their previous values.
+    """
+    previous = previous or {}
+    etags = {repo: row["etag"] for repo, row in previous.items()}
+    if concurrency > 1:
+        results = asyncio.run(fetch_repos_async(repos, tokens, concurrency, etags))
+    else:
+        results = {}
+        for repo in repos:
+            try:
+                results[repo] = fetch_github_repo(repo, tokens[0], etag=etags.get(repo))
+            except requests.RequestException as exc:
+                logger.warning("Skipping %s: %s", repo, exc)
+
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for repo, (payload, etag) in results.items():
+        if payload is None:
+            metrics[repo] = unchanged_metrics(previous[repo], repo)
+        else:
+            metrics[repo] = {**rest_metrics(payload, repo), "etag": etag}
+    unchanged = sum(1 for payload, _ in results.values() if payload is None)
+    logger.info("GitHub REST: %s repos changed, %s not modified", len(results) - unchanged, unchanged)
+    return metrics
+
+
+def build_batch_query(repos: Sequence[str]) -> Tuple[str, Dict[str, str]]:
+    declarations: List[str] = []
+    selections: List[str] = []
+    variables: Dict[str, str] = {}
+    for index, repo in enumerate(repos):
+        owner, name = repo.split("/", 1)
+        declarations.append(f"$owner{index}: String!, $name{index}: String!")
+        selections.append(f"  r{index}: repository(owner: $owner{index}, name: $name{index}) {{ ...RepoFields }}")
+        variables[f"owner{index}"] = owner
+        variables[f"name{index}"] = name
+    query = f"query({', '.join(declarations)}) {{\n" + "\n".join(selections) + "\n}\n" + REPO_FIELDS_FRAGMENT
+    return query, variables
+
+
+def fetch_github_repos_batch(
+    repos: Sequence[str],
+    token: str,
+    graphql_url: str = GITHUB_GRAPHQL_URL,
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch up to GRAPHQL_BATCH_SIZE repos in one aliased GraphQL query.
+
+    Returns the repository nodes keyed by the requested ``owner/name``; repos
+    GraphQL could not resolve (renamed, private, missing) are left out.
+    """
+    query, variables = build_batch_query(repos)
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = post_json(graphql_url, {"query": query, "variables": variables}, headers=headers, backoff=2)
+    data = payload.get("data") or {}
+    if payload.get("errors"):
+        logger.warning("GraphQL batch returned %s errors", len(payload["errors"]))
+    return {repo: data[f"r{index}"] for index, repo in enumerate(repos) if data.get(f"r{index}")}
+
+
+def rest_metrics(payload: Dict[str, Any], repo: str) -> Dict[str, Any]:
+    return {
+        "repo_full_name": payload.get("full_name", repo),
+        "stars": payload.get("stargazers_count", 0),
+        "forks": payload.get("forks_count", 0),
+        "open_issues": payload.get("open_issues_count", 0),
+        "watchers": payload.get("subscribers_count", payload.get("watchers_count", 0)),
+        "source_url": f"{GITHUB_API_BASE}/repos/{repo}",
+        "source_type": "github_api",
+        "raw_payload": payload,
+    }
+
+
+def unchanged_metrics(previous: Dict[str, Any], repo: str) -> Dict[str, Any]:
+    # The payload behind this ETag is already stored on the previous row.
+    return {
+        **{field: previous[field] for field in METRIC_FIELDS},
+        "source_url": f"{GITHUB_API_BASE}/repos/{repo}",
+        "source_type": "github_api",
+        "raw_payload": {"not_modified": True, "payload_id": previous["payload_id"]},
+        "etag": previous["etag"],
+    }
+
+
+def graphql_metrics(node: Dict[str, Any], graphql_url: str) -> Dict[str, Any]:
+    return {
+        "repo_full_name": node["nameWithOwner"],
+        "stars": node.get("stargazerCount", 0),
+        "forks": node.get("forkCount", 0),
+        "open_issues": (node.get("issues") or {}).get("totalCount", 0)
+        + (node.get("pullRequests") or {}).get("totalCount", 0),
+        "watchers": (node.get("watchers") or {}).get("totalCount", 0),
+        "source_url": graphql_url,
+        "source_type": "github_graphql",
+        "raw_payload": node,
+        "etag": None,
+    }
+
+
+def fetch_batched_metrics(
+    repos: Sequence[str],
+    tokens: Sequence[str],
+    graphql_url: str,
+    concurrency: int = 1,
+    previous: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    # GraphQL first, then one REST call for each repo the batches missed.
+    unique_repos = list(dict.fromkeys(repos))
+    token = tokens[0]
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for start in range(0, len(unique_repos), GRAPHQL_BATCH_SIZE):
+        chunk = unique_repos[start:start + GRAPHQL_BATCH_SIZE]
         try:
-            response.raise_for_status()
-            return response.json()
+            nodes = fetch_github_repos_batch(chunk, token, graphql_url)
         except requests.RequestException as exc:
-            if attempt == retries:
-                raise
-            backoff = 2 ** attempt
-            logger.warning("GitHub request failed (%s/%s): %s. Retrying in %ss", attempt, retries, exc, backoff)
-            time.sleep(backoff)
-    raise RuntimeError("Failed to fetch GitHub repo data")
+            logger.warning("GraphQL batch of %s repos failed: %s. Falling back to REST", len(chunk), exc)
+            nodes = {}
+        for repo, node in nodes.items():
+            metrics[repo] = graphql_metrics(node, graphql_url)
+
+    missing = [repo for repo in unique_repos if repo not in metrics]
+    if missing:
+        logger.info("Fetching %s repos over REST after GraphQL could not resolve them", len(missing))
+    metrics.update(fetch_rest_metrics(missing, tokens, concurrency, previous))
+    return metrics
 
 
 def fetch_github_links(engine: Any) -> Iterable[Tuple[str, str, str]]:
@@ -103,49 +372,119 @@ def fetch_github_links(engine: Any) -> Iterable[Tuple[str, str, str]]:
         yield row.id, row.projectId, row.url
 
 
+def load_previous_metrics(engine: Any, repos: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """Latest REST row with an ETag for each repo, keyed by ``owner/name``."""
+    urls = {f"{GITHUB_API_BASE}/repos/{repo}": repo for repo in repos}
+    if not urls:
+        return {}
+    # payload_id points at the row that holds the full payload, not at a marker row.
+    payload_id = func.coalesce(github_metrics.c.raw_payload["payload_id"].astext, github_metrics.c.id)
+    columns = [payload_id.label("payload_id"), github_metrics.c.source_url, github_metrics.c.etag]
+    columns += [github_metrics.c[field] for field in METRIC_FIELDS]
+    stmt = (
+        select(*columns)
+        .where(github_metrics.c.etag.isnot(None), github_metrics.c.source_url.in_(list(urls)))
+        .order_by(github_metrics.c.source_url, github_metrics.c.captured_at.desc())
+        .distinct(github_metrics.c.source_url)
+    )
+    with engine.connect() as connection:
+        rows = connection.execute(stmt).mappings().all()
+    return {urls[row["source_url"]]: dict(row) for row in rows}
+
+
+def group_links_by_repo(links: Iterable[Tuple[str, str, str]]) -> Dict[str, List[Tuple[str, str]]]:
+    """Map each normalized repo to the ``(link_id, project_id)`` pairs that link to it."""
+    grouped: Dict[str, List[Tuple[str, str]]] = {}
+    for link_id, project_id, url in links:
+        repo = parse_repo_from_url(url)
+        if not repo:
+            logger.warning("Skipping invalid GitHub URL: %s", url)
+            continue
+        grouped.setdefault(repo, []).append((link_id, project_id))
+    return grouped
+
+
+def fan_out_rows(
+    grouped: Dict[str, List[Tuple[str, str]]],
+    metrics: Dict[str, Dict[str, Any]],
+    captured_at: datetime,
+) -> List[Dict[str, Any]]:
+    rows = []
+    for repo, repo_links in grouped.items():
+        repo_metrics = metrics.get(repo)
+        if repo_metrics is None:
+            continue
+        for link_id, project_id in repo_links:
+            rows.append(
+                {
+                    "id": point_id("github", link_id, captured_at),
+                    "link_id": link_id,
+                    "project_id": project_id,
+                    **repo_metrics,
+                    "captured_at": captured_at,
+                }
+            )
+    return rows
+
+
+def share_payloads(rows: Iterable[Dict[str, Any]]) -> None:
+    # Only the first written row per repo keeps the payload; the rest point at
+    # it through raw_payload.payload_id.
+    shared: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        repo = row["repo_full_name"]
+        if repo in shared:
+            row["raw_payload"] = shared[repo]
+        else:
+            # A 304 row is already a marker; point past it to the stored payload.
+            shared[repo] = {"payload_id": row["raw_payload"].get("payload_id", row["id"])}
+
+
 def upsert_metrics(rows: Iterable[Dict[str, Any]]) -> None:
+    """Write a new point for links whose metrics changed; confirm the rest."""
     rows_list = list(rows)
     if not rows_list:
         logger.info("No GitHub metrics to insert")
         return
     engine = get_engine()
-    metadata.create_all(engine)
+    ensure_schema(engine)
+    confirmed_at = rows_list[0]["captured_at"]
     with engine.begin() as connection:
-        connection.execute(insert(github_metrics).values(rows_list))
-    logger.info("Inserted %s GitHub metric rows", len(rows_list))
+        # A 200 with unchanged metrics still carries a new ETag; keep it on
+        # the confirmed point so the next run sends the current validator.
+        changed, confirmed = split_changed(
+            connection, github_metrics, rows_list, "link_id", METRIC_FIELDS, refreshed=("etag",)
+        )
+        share_payloads(changed)
+        inserted, bumped = write_points(connection, github_metrics, changed, confirmed, confirmed_at)
+    logger.info("GitHub metrics: %s new points, %s unchanged", inserted, bumped)
 
 
-def run() -> None:
-    token = get_github_token()
+def run(batch: bool = False, graphql_url: Optional[str] = None, concurrency: int = 1) -> None:
     engine = get_engine()
-    metadata.create_all(engine)
+    tokens = get_github_tokens()
+    ensure_schema(engine)
 
-    metrics_rows = []
-    for link_id, project_id, url in fetch_github_links(engine):
-        repo = parse_repo_from_url(url)
-        if not repo:
-            logger.warning("Skipping invalid GitHub URL: %s", url)
-            continue
-        payload = fetch_github_repo(repo, token)
-        metrics_rows.append(
-            {
-                "id": str(uuid.uuid4()),
-                "link_id": link_id,
-                "project_id": project_id,
-                "repo_full_name": payload.get("full_name", repo),
-                "stars": payload.get("stargazers_count", 0),
-                "forks": payload.get("forks_count", 0),
-                "open_issues": payload.get("open_issues_count", 0),
-                "watchers": payload.get("subscribers_count", payload.get("watchers_count", 0)),
-                "captured_at": datetime.now(timezone.utc),
-                "source_url": f"{GITHUB_API_BASE}/repos/{repo}",
-                "source_type": "github_api",
-                "raw_payload": payload,
-            }
-        )
+    grouped = group_links_by_repo(fetch_github_links(engine))
+    repos = list(grouped)
+    logger.info("Fetching %s distinct repos for %s links", len(repos), sum(len(repo_links) for repo_links in grouped.values()))
+    previous = load_previous_metrics(engine, repos)
+    if batch:
+        graphql_url = graphql_url or os.getenv("GITHUB_GRAPHQL_URL", GITHUB_GRAPHQL_URL)
+        metrics = fetch_batched_metrics(repos, tokens, graphql_url, concurrency, previous)
+    else:
+        metrics = fetch_rest_metrics(repos, tokens, concurrency, previous)
 
-    upsert_metrics(metrics_rows)
+    upsert_metrics(fan_out_rows(grouped, metrics, datetime.now(timezone.utc)))
 
 
 if __name__ == "__main__":
-    run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fetch GitHub repo metrics for github_repo links")
+    parser.add_argument("--batch", action="store_true", help="Fetch up to 100 repos per GraphQL query")
+    parser.add_argument("--graphql-url", help="GraphQL endpoint (default: GITHUB_GRAPHQL_URL or api.github.com)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent REST requests (asyncio)")
+    args = parser.parse_args()
+
+    run(batch=args.batch, graphql_url=args.graphql_url, concurrency=args.concurrency)
@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from sqlalchemy import Column, DateTime, Float, MetaData, String, Table, create_engine, select
+from sqlalchemy import Column, DateTime, Float, MetaData, String, Table, create_engine, func, select
 from sqlalchemy.dialects.postgresql import JSONB, insert
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
@@ -26,6 +26,11 @@ impact_scores = Table(
 )
 
 
+# Metric columns calculate_score reads.
+GITHUB_COLUMNS = ("stars", "forks")
+YOUTUBE_COLUMNS = ("views",)
+
+
 @dataclass
 class KPIConfig:
     target: float
@@ -69,23 +74,27 @@ def normalize(value: Optional[float], target: float) -> float:
     return min(value / target, 1.0)
 
 
-def latest_metrics_by_project(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-    latest: Dict[str, Dict[str, Any]] = {}
-    for row in rows:
-        project_id = row["project_id"]
-        captured_at = row["captured_at"]
-        existing = latest.get(project_id)
-        if existing is None or captured_at > existing["captured_at"]:
-            latest[project_id] = row
-    return latest
-
+def fetch_latest_metrics(engine: Any, table_name: str, columns: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Current metrics per project, aggregated server-side.
 
-def fetch_metrics(engine: Any, table_name: str) -> List[Dict[str, Any]]:
+    Series are written per link and only when a value changes, so the newest
+    row of a project is just whichever link changed last. DISTINCT ON walks
+    the (link_id, captured_at) index for each link's current point, and the
+    project takes the max of ``columns`` over its links.
+    """
     table = Table(table_name, metadata, autoload_with=engine)
-    stmt = select(table)
-    with engine.begin() as connection:
+    current = (
+        select(table.c.project_id, *[table.c[column] for column in columns])
+        .order_by(table.c.link_id, table.c.captured_at.desc(), table.c.id.desc())
+        .distinct(table.c.link_id)
+        .subquery()
+    )
+    stmt = select(current.c.project_id, *[func.max(current.c[column]).label(column) for column in columns]).group_by(
+        current.c.project_id
+    )
+    with engine.connect() as connection:
         rows = connection.execute(stmt).mappings().all()
-    return [dict(row) for row in rows]
+    return {row["project_id"]: dict(row) for row in rows}
 
 
 def fetch_projects(engine: Any) -> List[Dict[str, Any]]:
@@ -156,8 +165,8 @@ def run() -> None:
     engine = get_engine()
     metadata.create_all(engine)
 
-    github_metrics = latest_metrics_by_project(fetch_metrics(engine, "github_repo_metrics"))
-    youtube_metrics = latest_metrics_by_project(fetch_metrics(engine, "youtube_metrics"))
+    github_metrics = fetch_latest_metrics(engine, "github_repo_metrics", GITHUB_COLUMNS)
+    youtube_metrics = fetch_latest_metrics(engine, "youtube_metrics", YOUTUBE_COLUMNS)
     projects = fetch_projects(engine)
 
     now = datetime.now(timezone.utc)
@@ -1,17 +1,68 @@
 import logging
+import math
 import os
-import time
-import uuid
-from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from urllib.parse import parse_qs, urlparse
 
 import requests
 from dotenv import load_dotenv
-from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    delete,
+    select,
+    text,
+    tuple_,
+)
 from sqlalchemy.dialects.postgresql import JSONB, insert
 
+from common.http_client import get_json
+from common.timeseries import ensure_timeseries_columns, point_id, split_changed, write_points
+
 YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
+API_BATCH_SIZE = 50
+TRACKED_FIELDS = ("resource_type", "resource_id", "views", "likes", "comments")
+HANDLE_TTL = timedelta(days=30)
+MISSING_HANDLE_TTL = timedelta(days=1)
+MISSING_RESOURCE_TTL = timedelta(days=1)
+# YouTube Data API v3 charges 1 unit per videos.list / channels.list call,
+# whatever the number of ids; the default project quota is 10,000 units a day.
+UNIT_COSTS = {"videos": 1, "channels": 1}
+DEFAULT_QUOTA_BUDGET = 10000
+
+# Current point and the one before it for every resource, for staleness and
+# view velocity. Links to the same resource each write their own rows, so
+# points are first collapsed to one per (resource, captured_at); otherwise
+# lag() can land on a sibling link's row with the same captured_at. Window
+# functions run before DISTINCT ON.
+REFRESH_STATE_SQL = """
+SELECT DISTINCT ON (resource_type, resource_id)
+       resource_type,
+       resource_id,
+       views,
+       captured_at,
+       confirmed_at,
+       lag(views) OVER series AS previous_views,
+       lag(captured_at) OVER series AS previous_captured_at
+FROM (
+    SELECT resource_type,
+           resource_id,
+           captured_at,
+           max(views) AS views,
+           max(COALESCE(last_confirmed_at, captured_at)) AS confirmed_at
+    FROM youtube_metrics
+    GROUP BY resource_type, resource_id, captured_at
+) AS points
+WINDOW series AS (PARTITION BY resource_type, resource_id ORDER BY captured_at)
+ORDER BY resource_type, resource_id, captured_at DESC
+"""
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("metrics.youtube")
@@ -33,6 +84,29 @@ youtube_metrics = Table(
     Column("source_url", String, nullable=False),
     Column("source_type", String, nullable=False),
     Column("raw_payload", JSONB, nullable=False),
+    Column("last_confirmed_at", DateTime(timezone=True)),
+    # Current point per link (change-only writes and impact scoring).
+    Index("ix_youtube_metrics_link_captured", "link_id", "captured_at"),
+)
+
+# channel_id is NULL for handles the API reported as not existing.
+youtube_handle_cache = Table(
+    "youtube_handle_cache",
+    metadata,
+    Column("handle", String, primary_key=True),
+    Column("channel_id", String, nullable=True),
+    Column("resolved_at", DateTime(timezone=True), nullable=False),
+)
+
+# Videos and channels the statistics endpoints answered without an item
+# (deleted, private or bad ids). They never get a metrics row, so this is
+# what keeps them from ranking as never fetched on every run.
+youtube_resource_misses = Table(
+    "youtube_resource_misses",
+    metadata,
+    Column("resource_type", String, primary_key=True),
+    Column("resource_id", String, primary_key=True),
+    Column("missed_at", DateTime(timezone=True), nullable=False),
 )
 
 
@@ -44,6 +118,40 @@ def get_engine() -> Any:
     return create_engine(database_url)
 
 
+def ensure_schema(engine: Any) -> None:
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        ensure_timeseries_columns(connection, youtube_metrics)
+        for index in youtube_metrics.indexes:
+            index.create(connection, checkfirst=True)
+
+
+class QuotaBudget:
+    """Per-run YouTube API unit budget."""
+
+    def __init__(self, units: int):
+        self.remaining = units
+        # Set once the API reports quotaExceeded; units already charged for
+        # planned batches can no longer be spent either.
+        self.exhausted = False
+
+    def charge(self, endpoint: str) -> bool:
+        cost = UNIT_COSTS[endpoint]
+        if cost > self.remaining:
+            return False
+        self.remaining -= cost
+        return True
+
+    def exhaust(self) -> None:
+        self.remaining = 0
+        self.exhausted = True
+
+
+def is_quota_exceeded(exc: requests.RequestException) -> bool:
+    response = exc.response
+    return response is not None and response.status_code == 403 and "quotaExceeded" in response.text
+
+
 def get_youtube_key() -> str:
     key = os.getenv("YOUTUBE_API_KEY")
     if not key:
@@ -77,7 +185,7 @@ def parse_youtube_resource(url: str) -> Optional[Tuple[str, str]]:
         return "channel", channel_id
 
     if path.startswith("@"):
-        handle = path.lstrip("@")
+        handle = path.lstrip("@").split("/")[0]
         if handle:
             return "handle", handle
 
@@ -95,9 +203,7 @@ def resolve_channel_id(resource: Tuple[str, str], api_key: str) -> Optional[str]
             "forHandle": identifier,
             "key": api_key,
         }
-        response = requests.get(f"{YOUTUBE_API_BASE}/channels", params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+        data = get_json(f"{YOUTUBE_API_BASE}/channels", params=params)
         items = data.get("items") or []
         if items:
             return items[0]["id"]
@@ -106,34 +212,88 @@ def resolve_channel_id(resource: Tuple[str, str], api_key: str) -> Optional[str]
     return None
 
 
-def fetch_video_stats(video_id: str, api_key: str) -> Dict[str, Any]:
-    params = {
-        "part": "statistics",
-        "id": video_id,
-        "key": api_key,
+def _fetch_statistics(
+    endpoint: str,
+    ids: Sequence[str],
+    api_key: str,
+    budget: QuotaBudget,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Statistics items by id, and the ids a successful call returned no item for.
+
+    videos.list and channels.list take up to API_BATCH_SIZE comma-separated
+    ids per call. The calls were paid for by ``plan_refresh``; once the API
+    reports quotaExceeded the budget is exhausted and no further call goes out.
+    """
+    items: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for start in range(0, len(ids), API_BATCH_SIZE):
+        if budget.exhausted:
+            logger.warning("YouTube quota exceeded; leaving %s %s ids for the next run", len(ids) - start, endpoint)
+            break
+        chunk = ids[start:start + API_BATCH_SIZE]
+        params = {
+            "part": "statistics",
+            "id": ",".join(chunk),
+            "key": api_key,
+        }
+        try:
+            data = get_json(f"{YOUTUBE_API_BASE}/{endpoint}", params=params)
+        except requests.RequestException as exc:
+            if is_quota_exceeded(exc):
+                budget.exhaust()
+                continue
+            logger.warning("YouTube %s batch of %s ids failed: %s", endpoint, len(chunk), exc)
+            continue
+        for item in data.get("items") or []:
+            items[item["id"]] = item
+        missing.extend(resource_id for resource_id in chunk if resource_id not in items)
+    if missing:
+        logger.warning("YouTube %s: no statistics for %s of %s ids", endpoint, len(missing), len(ids))
+    return items, missing
+
+
+def fetch_video_stats(
+    video_ids: Sequence[str],
+    api_key: str,
+    budget: QuotaBudget,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    return _fetch_statistics("videos", video_ids, api_key, budget)
+
+
+def fetch_channel_stats(
+    channel_ids: Sequence[str],
+    api_key: str,
+    budget: QuotaBudget,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    return _fetch_statistics("channels", channel_ids, api_key, budget)
+
+
+def video_metrics(video_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    stats = payload.get("statistics", {})
+    return {
+        "resource_type": "video",
+        "resource_id": video_id,
+        "views": int(stats.get("viewCount", 0)),
+        "likes": int(stats.get("likeCount", 0)),
+        "comments": int(stats.get("commentCount", 0)),
+        "source_url": f"{YOUTUBE_API_BASE}/videos?id={video_id}",
+        "source_type": "youtube_api",
+        "raw_payload": payload,
     }
-    response = requests.get(f"{YOUTUBE_API_BASE}/videos", params=params, timeout=30)
-    response.raise_for_status()
-    data = response.json()
-    items = data.get("items") or []
-    if not items:
-        raise RuntimeError(f"No video found for {video_id}")
-    return items[0]
-
-
-def fetch_channel_stats(channel_id: str, api_key: str) -> Dict[str, Any]:
-    params = {
-        "part": "statistics",
-        "id": channel_id,
-        "key": api_key,
+
+
+def channel_metrics(channel_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    stats = payload.get("statistics", {})
+    return {
+        "resource_type": "channel",
+        "resource_id": channel_id,
+        "views": int(stats.get("viewCount", 0)),
+        "likes": int(stats.get("subscriberCount", 0)),
+        "comments": int(stats.get("videoCount", 0)),
+        "source_url": f"{YOUTUBE_API_BASE}/channels?id={channel_id}",
+        "source_type": "youtube_api",
+        "raw_payload": payload,
     }
-    response = requests.get(f"{YOUTUBE_API_BASE}/channels", params=params, timeout=30)
-    response.raise_for_status()
-    data = response.json()
-    items = data.get("items") or []
-    if not items:
-        raise RuntimeError(f"No channel found for {channel_id}")
-    return items[0]
 
 
 def fetch_youtube_links(engine: Any) -> Iterable[Tuple[str, str, str]]:
@@ -148,78 +308,259 @@ def fetch_youtube_links(engine: Any) -> Iterable[Tuple[str, str, str]]:
 
 
 def upsert_metrics(rows: Iterable[Dict[str, Any]]) -> None:
+    """Write a new point for links whose metrics changed; confirm the rest."""
     rows_list = list(rows)
     if not rows_list:
         logger.info("No YouTube metrics to insert")
         return
     engine = get_engine()
-    metadata.create_all(engine)
+    ensure_schema(engine)
+    confirmed_at = rows_list[0]["captured_at"]
     with engine.begin() as connection:
-        connection.execute(insert(youtube_metrics).values(rows_list))
-    logger.info("Inserted %s YouTube metric rows", len(rows_list))
-
+        changed, confirmed = split_changed(connection, youtube_metrics, rows_list, "link_id", TRACKED_FIELDS)
+        inserted, bumped = write_points(connection, youtube_metrics, changed, confirmed, confirmed_at)
+    logger.info("YouTube metrics: %s new points, %s unchanged", inserted, bumped)
+
+
+def load_cached_handles(connection: Any, handles: Sequence[str], now: datetime) -> Dict[str, Optional[str]]:
+    """Unexpired cache entries for ``handles``; a None value is a cached miss."""
+    if not handles:
+        return {}
+    stmt = select(youtube_handle_cache).where(youtube_handle_cache.c.handle.in_(list(handles)))
+    cached: Dict[str, Optional[str]] = {}
+    for row in connection.execute(stmt):
+        ttl = HANDLE_TTL if row.channel_id else MISSING_HANDLE_TTL
+        if now - row.resolved_at < ttl:
+            cached[row.handle] = row.channel_id
+    return cached
+
+
+def save_cached_handles(connection: Any, resolved: Dict[str, Optional[str]], now: datetime) -> None:
+    if not resolved:
+        return
+    rows = [{"handle": handle, "channel_id": channel_id, "resolved_at": now} for handle, channel_id in resolved.items()]
+    stmt = insert(youtube_handle_cache).values(rows)
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["handle"],
+            set_={"channel_id": stmt.excluded.channel_id, "resolved_at": stmt.excluded.resolved_at},
+        )
+    )
 
-def run() -> None:
-    api_key = get_youtube_key()
-    engine = get_engine()
-    metadata.create_all(engine)
 
-    metrics_rows = []
-    for link_id, project_id, url in fetch_youtube_links(engine):
+def resolve_handles(
+    engine: Any,
+    handles: Sequence[str],
+    api_key: str,
+    budget: QuotaBudget,
+) -> Dict[str, Optional[str]]:
+    """Map lower-cased handles to channel ids, calling the API only for uncached or expired ones.
+
+    Lookups the budget cannot pay for map to None and are retried next run.
+    """
+    now = datetime.now(timezone.utc)
+    with engine.connect() as connection:
+        channel_by_handle = load_cached_handles(connection, handles, now)
+    cached = len(channel_by_handle)
+    resolved: Dict[str, Optional[str]] = {}
+    for handle in handles:
+        if handle in channel_by_handle:
+            continue
+        if not budget.charge("channels"):
+            channel_by_handle[handle] = None
+            continue
+        try:
+            resolved[handle] = resolve_channel_id(("handle", handle), api_key)
+        except requests.RequestException as exc:
+            # Errors are not cached; the handle is retried next run.
+            logger.warning("YouTube API error resolving @%s: %s", handle, exc)
+            channel_by_handle[handle] = None
+            if is_quota_exceeded(exc):
+                budget.exhaust()
+    with engine.begin() as connection:
+        save_cached_handles(connection, resolved, now)
+    logger.info("YouTube handles: %s from cache, %s resolved", cached, len(resolved))
+    channel_by_handle.update(resolved)
+    return channel_by_handle
+
+
+def resolve_links(
+    engine: Any,
+    links: Iterable[Tuple[str, str, str]],
+    api_key: str,
+    budget: QuotaBudget,
+) -> List[Tuple[str, str, str, str]]:
+    """Parse links into ``(link_id, project_id, resource_type, resource_id)`` with handles resolved."""
+    parsed: List[Tuple[str, str, Tuple[str, str]]] = []
+    for link_id, project_id, url in links:
         resource = parse_youtube_resource(url)
         if not resource:
             logger.warning("Skipping invalid YouTube URL: %s", url)
             continue
+        parsed.append((link_id, project_id, resource))
+
+    # Each distinct handle is resolved once, however many links use it.
+    handles = list(dict.fromkeys(resource[1].lower() for _, _, resource in parsed if resource[0] == "handle"))
+    channel_by_handle = resolve_handles(engine, handles, api_key, budget)
+
+    resolved: List[Tuple[str, str, str, str]] = []
+    for link_id, project_id, (resource_type, identifier) in parsed:
+        if resource_type == "handle":
+            channel_id = channel_by_handle[identifier.lower()]
+            if not channel_id:
+                logger.warning("Could not resolve channel for @%s", identifier)
+                continue
+            resolved.append((link_id, project_id, "channel", channel_id))
+        else:
+            resolved.append((link_id, project_id, resource_type, identifier))
+    return resolved
+
+
+def load_refresh_state(engine: Any) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    with engine.connect() as connection:
+        rows = connection.execute(text(REFRESH_STATE_SQL)).mappings().all()
+    return {(row["resource_type"], row["resource_id"]): dict(row) for row in rows}
+
+
+def load_misses(engine: Any) -> Dict[Tuple[str, str], datetime]:
+    with engine.connect() as connection:
+        rows = connection.execute(select(youtube_resource_misses)).all()
+    return {(row.resource_type, row.resource_id): row.missed_at for row in rows}
+
+
+def save_misses(
+    connection: Any,
+    missed: Sequence[Tuple[str, str]],
+    found: Sequence[Tuple[str, str]],
+    now: datetime,
+) -> None:
+    """Record ``missed`` resources at ``now`` and forget earlier misses of ``found`` ones."""
+    if found:
+        key = tuple_(youtube_resource_misses.c.resource_type, youtube_resource_misses.c.resource_id)
+        connection.execute(delete(youtube_resource_misses).where(key.in_(list(found))))
+    if missed:
+        rows = [{"resource_type": kind, "resource_id": resource_id, "missed_at": now} for kind, resource_id in missed]
+        stmt = insert(youtube_resource_misses).values(rows)
+        connection.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["resource_type", "resource_id"],
+                set_={"missed_at": stmt.excluded.missed_at},
+            )
+        )
+
+
+def refresh_priority(state: Optional[Dict[str, Any]], now: datetime, missed_at: Optional[datetime] = None) -> float:
+    """Days since last attempted, scaled up by how fast views have been growing.
+
+    Resources never attempted come first. An attempt is the last confirmed
+    point or, for resources the API stopped returning, the last miss. Flat
+    resources still age into the queue; fast-moving ones get there sooner.
+    """
+    if state is None and missed_at is None:
+        return math.inf
+    attempted = [state["confirmed_at"]] if state is not None else []
+    if missed_at is not None:
+        attempted.append(missed_at)
+    stale_days = (now - max(attempted)).total_seconds() / 86400
+    views_per_day = 0.0
+    if state is not None and state["previous_captured_at"] is not None:
+        elapsed_days = (state["captured_at"] - state["previous_captured_at"]).total_seconds() / 86400
+        if elapsed_days > 0:
+            views_per_day = max(0.0, (state["views"] - state["previous_views"]) / elapsed_days)
+    return stale_days * (1 + math.log1p(views_per_day))
+
+
+def plan_refresh(
+    resources: Sequence[Tuple[str, str]],
+    state: Dict[Tuple[str, str], Dict[str, Any]],
+    budget: QuotaBudget,
+    now: datetime,
+    misses: Optional[Dict[Tuple[str, str], datetime]] = None,
+) -> Tuple[List[str], List[str]]:
+    """Pick the video and channel ids this run's budget can refresh, most urgent first.
+
+    Each started batch of API_BATCH_SIZE ids is charged one call. Ids left
+    out stay stale and rank higher next run. Resources missed within
+    MISSING_RESOURCE_TTL are not retried yet.
+    """
+    misses = misses or {}
+    selected: Dict[str, List[str]] = {"video": [], "channel": []}
+    candidates = [
+        resource
+        for resource in resources
+        if resource not in misses or now - misses[resource] >= MISSING_RESOURCE_TTL
+    ]
+    ranked = sorted(
+        candidates,
+        key=lambda resource: refresh_priority(state.get(resource), now, misses.get(resource)),
+        reverse=True,
+    )
+    for resource_type, resource_id in ranked:
+        ids = selected[resource_type]
+        endpoint = "videos" if resource_type == "video" else "channels"
+        if len(ids) % API_BATCH_SIZE == 0 and not budget.charge(endpoint):
+            continue
+        ids.append(resource_id)
+    return selected["video"], selected["channel"]
 
-        try:
-            if resource[0] == "video":
-                payload = fetch_video_stats(resource[1], api_key)
-                stats = payload.get("statistics", {})
-                metrics_rows.append(
-                    {
-                        "id": str(uuid.uuid4()),
-                        "link_id": link_id,
-                        "project_id": project_id,
-                        "resource_type": "video",
-                        "resource_id": resource[1],
-                        "views": int(stats.get("viewCount", 0)),
-                        "likes": int(stats.get("likeCount", 0)),
-                        "comments": int(stats.get("commentCount", 0)),
-                        "captured_at": datetime.now(timezone.utc),
-                        "source_url": f"{YOUTUBE_API_BASE}/videos?id={resource[1]}",
-                        "source_type": "youtube_api",
-                        "raw_payload": payload,
-                    }
-                )
-            else:
-                channel_id = resolve_channel_id(resource, api_key)
-                if not channel_id:
-                    logger.warning("Could not resolve channel for %s", url)
-                    continue
-                payload = fetch_channel_stats(channel_id, api_key)
-                stats = payload.get("statistics", {})
-                metrics_rows.append(
-                    {
-                        "id": str(uuid.uuid4()),
-                        "link_id": link_id,
-                        "project_id": project_id,
-                        "resource_type": "channel",
-                        "resource_id": channel_id,
-                        "views": int(stats.get("viewCount", 0)),
-                        "likes": int(stats.get("subscriberCount", 0)),
-                        "comments": int(stats.get("videoCount", 0)),
-                        "captured_at": datetime.now(timezone.utc),
-                        "source_url": f"{YOUTUBE_API_BASE}/channels?id={channel_id}",
-                        "source_type": "youtube_api",
-                        "raw_payload": payload,
-                    }
-                )
-        except requests.RequestException as exc:
-            logger.warning("YouTube API error for %s: %s", url, exc)
-            time.sleep(1.5)
+
+def run(quota: Optional[int] = None) -> None:
+    api_key = get_youtube_key()
+    engine = get_engine()
+    ensure_schema(engine)
+    captured_at = datetime.now(timezone.utc)
+    if quota is None:
+        quota = int(os.getenv("YOUTUBE_QUOTA_BUDGET", str(DEFAULT_QUOTA_BUDGET)))
+    budget = QuotaBudget(quota)
+
+    links = resolve_links(engine, fetch_youtube_links(engine), api_key, budget)
+    resources = list(dict.fromkeys((kind, resource_id) for _, _, kind, resource_id in links))
+    state = load_refresh_state(engine)
+    video_ids, channel_ids = plan_refresh(resources, state, budget, captured_at, load_misses(engine))
+    deferred = len(resources) - len(video_ids) - len(channel_ids)
+    logger.info(
+        "Refreshing %s videos and %s channels (%s deferred, %s quota units left)",
+        len(video_ids),
+        len(channel_ids),
+        deferred,
+        budget.remaining,
+    )
+    videos, missing_videos = fetch_video_stats(video_ids, api_key, budget)
+    channels, missing_channels = fetch_channel_stats(channel_ids, api_key, budget)
+    missed = [("video", video_id) for video_id in missing_videos]
+    missed += [("channel", channel_id) for channel_id in missing_channels]
+    found = [("video", video_id) for video_id in videos] + [("channel", channel_id) for channel_id in channels]
+    with engine.begin() as connection:
+        save_misses(connection, missed, found, captured_at)
+
+    metrics_rows = []
+    for link_id, project_id, resource_type, resource_id in links:
+        if resource_type == "video":
+            payload = videos.get(resource_id)
+            metrics = video_metrics(resource_id, payload) if payload else None
+        else:
+            payload = channels.get(resource_id)
+            metrics = channel_metrics(resource_id, payload) if payload else None
+        if metrics is None:
+            continue
+        metrics_rows.append(
+            {
+                "id": point_id("youtube", link_id, captured_at),
+                "link_id": link_id,
+                "project_id": project_id,
+                **metrics,
+                "captured_at": captured_at,
+            }
+        )
 
     upsert_metrics(metrics_rows)
 
 
 if __name__ == "__main__":
-    run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fetch YouTube metrics for youtube links")
+    parser.add_argument("--quota", type=int, help="API units this run may spend (default: YOUTUBE_QUOTA_BUDGET or 10000)")
+    args = parser.parse_args()
+
+    run(quota=args.quota)
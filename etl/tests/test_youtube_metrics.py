@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import requests
+
+from metrics import youtube_metrics
+from metrics.youtube_metrics import QuotaBudget, fetch_channel_stats, fetch_video_stats, plan_refresh
+
+
+def _quota_exceeded() -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = 403
+    response._content = b'{"error": {"errors": [{"reason": "quotaExceeded"}]}}'
+    return requests.HTTPError("403 Forbidden", response=response)
+
+
+def test_quota_exceeded_on_videos_skips_channel_calls():
+    budget = QuotaBudget(10)
+    budget.charge("videos")
+    budget.charge("channels")
+    calls = []
+
+    def fake_get_json(url, params):
+        calls.append(url)
+        raise _quota_exceeded()
+
+    with mock.patch.object(youtube_metrics, "get_json", side_effect=fake_get_json):
+        videos, missing_videos = fetch_video_stats(["v1", "v2"], "key", budget)
+        channels, missing_channels = fetch_channel_stats(["c1"], "key", budget)
+
+    assert calls == [f"{youtube_metrics.YOUTUBE_API_BASE}/videos"]
+    assert budget.exhausted and budget.remaining == 0
+    assert videos == {} and channels == {}
+    # Nothing was answered, so nothing is recorded as missing either.
+    assert missing_videos == [] and missing_channels == []
+
+
+def test_statistics_report_ids_without_items():
+    budget = QuotaBudget(10)
+    data = {"items": [{"id": "v1", "statistics": {"viewCount": "5"}}]}
+    with mock.patch.object(youtube_metrics, "get_json", return_value=data):
+        videos, missing = fetch_video_stats(["v1", "gone"], "key", budget)
+    assert list(videos) == ["v1"]
+    assert missing == ["gone"]
+
+
+def test_recent_misses_are_not_replanned():
+    now = datetime(2026, 1, 10, tzinfo=timezone.utc)
+    state = {
+        ("video", "stale"): {
+            "views": 10,
+            "captured_at": now - timedelta(days=3),
+            "confirmed_at": now - timedelta(days=3),
+            "previous_views": None,
+            "previous_captured_at": None,
+        }
+    }
+    misses = {
+        ("video", "gone"): now - timedelta(hours=2),
+        ("video", "retry"): now - timedelta(days=2),
+    }
+    resources = [("video", "gone"), ("video", "retry"), ("video", "stale"), ("video", "new")]
+
+    videos, channels = plan_refresh(resources, state, QuotaBudget(10), now, misses)
+
+    assert videos == ["new", "stale", "retry"]
+    assert channels == []
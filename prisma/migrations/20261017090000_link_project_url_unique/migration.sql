@@ -0,0 +1,9 @@
+-- Remove duplicate links before enforcing uniqueness (keep the oldest row)
+DELETE FROM "Link" a
+USING "Link" b
+WHERE a."projectId" = b."projectId"
+  AND a."url" = b."url"
+  AND (a."createdAt", a."id") > (b."createdAt", b."id");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "Link_projectId_url_key" ON "Link"("projectId", "url");